@@ -4,21 +4,19 @@ Music Production Assistant Backend
 Handles LLM processing, OpenAI Whisper transcription, and REAPER integration using reapy
 """
 
+import functools
 import json
 import sys
 import logging
-import threading
 import time
-import asyncio
-import websockets
 import base64
 import io
-from datetime import datetime
 import random
+from collections import deque
+import re
 import os
 from typing import Dict, Any, List
 import wave
-import tempfile
 import numpy as np
 
 # Load environment variables from .env file
@@ -41,15 +39,38 @@ except ImportError:
 
 # Beatoven.ai for music generation
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Beatoven.ai endpoints
+BEATOVEN_API_BASE = "https://public-api.beatoven.ai/api/v1"
+BEATOVEN_COMPOSE_URL = f"{BEATOVEN_API_BASE}/tracks/compose"
+BEATOVEN_TASKS_URL = f"{BEATOVEN_API_BASE}/tasks"
+
+# Shared HTTP session so compose, status polling and downloads reuse
+# keep-alive connections instead of a new TCP+TLS handshake per request
+beatoven_session = requests.Session()
+beatoven_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504), raise_on_status=False)
+))
 
 # Flask for HTTP endpoints
 try:
     from flask import Flask, request, jsonify
+    from flask.json.provider import DefaultJSONProvider
     from flask_cors import CORS
 except ImportError:
     print("Error: flask not found. Please install with: pip install flask flask-cors")
     Flask = None
 
+# orjson for faster (de)serialization of the base64 audio payloads (optional)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Import reapy instead of ReaScript API
 try:
     import reapy
@@ -68,50 +89,125 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+if orjson:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson"""
+        
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj).decode('utf-8')
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+    
+    app.json = OrjsonProvider(app)
+
 # Global conversation history (in production, you'd want to store this per user/session)
-conversation_history = []
 MAX_HISTORY = 10  # Keep last 10 messages for context
+conversation_history = deque(maxlen=MAX_HISTORY)
+
+@functools.lru_cache(maxsize=1)
+def get_openai_client():
+    """Shared OpenAI client (reads OPENAI_API_KEY once, on first use) so requests reuse its connection pool"""
+    return OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+def add_audio_to_reaper(file_path):
+    """Add an audio file to a new REAPER track; returns False when reapy is unavailable"""
+    if 'reapy' not in sys.modules:
+        return False
+    
+    # Add the generated audio file to REAPER; inside_reaper() keeps REAPER
+    # servicing these calls back to back. The project is resolved on every
+    # call so audio lands in whichever project tab is currently active.
+    with reapy.inside_reaper():
+        project = reapy.Project()
+        track = project.add_track()
+        track.add_item(0, file_path)
+    return True
+
+# System prompt for the /chat music production assistant
+CHAT_SYSTEM_PROMPT = """You are DAWZY, a helpful music production assistant specializing in the REAPER DAW. You can help with:
+
+- REAPER workflow questions and tutorials
+- Audio production techniques and best practices
+- Track management and organization
+- Effects and processing chains
+- MIDI and audio editing
+- Automation and mixing
+- Music theory and composition
+- Sound design and synthesis
+- AI-powered music generation using Beatoven.ai
+
+IMPORTANT: When users request music generation, you MUST respond with a JSON object. Look for these keywords and phrases:
+- "generate", "create", "make", "produce"
+- "track", "beat", "melody", "bass", "drum", "snare", "kick", "hi-hat"
+- "music", "song", "rhythm", "pattern"
+- "bpm", "tempo", "key", "genre"
+
+Examples of requests that should trigger music generation:
+- "can you generate me a snare drumline please"
+- "create a techno track with heavy bass"
+- "make a beat at 120 bpm"
+- "generate a peaceful ambient melody"
+- "produce a dark techno track"
+- "create an 80s rock song without drums"
+
+INSTRUMENT COVERAGE GUIDELINES:
+- By default, include ALL essential instruments: drums, bass, rhythm, lead melody, harmony
+- Only exclude instruments if the user specifically requests it (e.g., "without drums", "no bass")
+- Always create complete instrumental arrangements unless specified otherwise
+- Focus on musical composition, not vocals or lyrics
+
+When you detect a music generation request, respond with this exact JSON format:
+{
+  "action": "generate_music",
+  "instructions": "detailed music generation instructions including tempo, genre, instruments, and any specific exclusions",
+  "response": "your helpful response about the music generation"
+}
+
+For regular questions about REAPER, music theory, or production techniques, respond normally without JSON formatting.
+
+Be helpful, concise, and focus on practical music production advice. If someone asks about creating tracks, melodies, or specific REAPER features, provide detailed, actionable guidance. Keep responses conversational but informative."""
 
 @app.route('/transcribe', methods=['POST'])
 def transcribe_audio():
     """Transcribe audio using OpenAI Whisper"""
     try:
-        data = request.get_json()
-        if not data or 'audio' not in data:
+        if request.mimetype.startswith('audio/'):
+            # Raw audio body (e.g. audio/webm) - no base64 envelope to decode
+            audio_data = request.get_data()
+            filename = f"audio.{request.mimetype.split('/', 1)[1]}"
+        else:
+            data = request.get_json()
+            if not data or 'audio' not in data:
+                return jsonify({'success': False, 'error': 'No audio data provided'})
+            
+            # Decode base64 audio
+            audio_data = base64.b64decode(data['audio'])
+            filename = "audio.webm"
+        
+        if not audio_data:
             return jsonify({'success': False, 'error': 'No audio data provided'})
         
-        # Decode base64 audio
-        audio_data = base64.b64decode(data['audio'])
+        # Transcribe using OpenAI Whisper
+        if not OpenAI:
+            return jsonify({'success': False, 'error': 'OpenAI not available'})
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as temp_file:
-            temp_file.write(audio_data)
-            temp_file_path = temp_file.name
+        client = get_openai_client()
         
-        try:
-            # Transcribe using OpenAI Whisper
-            if not OpenAI:
-                return jsonify({'success': False, 'error': 'OpenAI not available'})
-            
-            client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-            
-            with open(temp_file_path, 'rb') as audio_file:
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
-                )
-            
-            logger.info(f"Transcription successful: {transcript}")
-            
-            return jsonify({
-                'success': True,
-                'transcript': transcript
-            })
-            
-        finally:
-            # Clean up temporary file
-            os.unlink(temp_file_path)
+        # Hand the decoded bytes straight to the client instead of
+        # round-tripping them through a temporary file on disk
+        transcript = client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(filename, audio_data),
+            response_format="text"
+        )
+        
+        logger.info(f"Transcription successful: {transcript}")
+        
+        return jsonify({
+            'success': True,
+            'transcript': transcript
+        })
             
     except Exception as e:
         logger.error(f"Transcription error: {e}")
@@ -131,7 +227,7 @@ def text_to_speech():
         if not OpenAI:
             return jsonify({'success': False, 'error': 'OpenAI not available'})
         
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        client = get_openai_client()
         
         # Generate speech using OpenAI TTS
         response = client.audio.speech.create(
@@ -159,8 +255,6 @@ def text_to_speech():
 @app.route('/chat', methods=['POST'])
 def chat_message():
     """Handle chat messages with OpenAI GPT"""
-    global conversation_history  # Declare as global
-    
     try:
         data = request.get_json()
         if not data or 'message' not in data:
@@ -174,61 +268,15 @@ def chat_message():
             response = "I'm sorry, but I'm not able to process your request right now. Please try again later."
         else:
             try:
-                client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-                
-                # Create a conversation context for music production
-                system_prompt = """You are DAWZY, a helpful music production assistant specializing in the REAPER DAW. You can help with:
-
-- REAPER workflow questions and tutorials
-- Audio production techniques and best practices
-- Track management and organization
-- Effects and processing chains
-- MIDI and audio editing
-- Automation and mixing
-- Music theory and composition
-- Sound design and synthesis
-- AI-powered music generation using Beatoven.ai
-
-IMPORTANT: When users request music generation, you MUST respond with a JSON object. Look for these keywords and phrases:
-- "generate", "create", "make", "produce"
-- "track", "beat", "melody", "bass", "drum", "snare", "kick", "hi-hat"
-- "music", "song", "rhythm", "pattern"
-- "bpm", "tempo", "key", "genre"
-
-Examples of requests that should trigger music generation:
-- "can you generate me a snare drumline please"
-- "create a techno track with heavy bass"
-- "make a beat at 120 bpm"
-- "generate a peaceful ambient melody"
-- "produce a dark techno track"
-- "create an 80s rock song without drums"
-
-INSTRUMENT COVERAGE GUIDELINES:
-- By default, include ALL essential instruments: drums, bass, rhythm, lead melody, harmony
-- Only exclude instruments if the user specifically requests it (e.g., "without drums", "no bass")
-- Always create complete instrumental arrangements unless specified otherwise
-- Focus on musical composition, not vocals or lyrics
-
-When you detect a music generation request, respond with this exact JSON format:
-{
-  "action": "generate_music",
-  "instructions": "detailed music generation instructions including tempo, genre, instruments, and any specific exclusions",
-  "response": "your helpful response about the music generation"
-}
-
-For regular questions about REAPER, music theory, or production techniques, respond normally without JSON formatting.
-
-Be helpful, concise, and focus on practical music production advice. If someone asks about creating tracks, melodies, or specific REAPER features, provide detailed, actionable guidance. Keep responses conversational but informative."""
-
-                # Build messages array with system prompt and conversation history
-                messages = [{"role": "system", "content": system_prompt}]
-                
-                # Add conversation history for context
-                for msg in conversation_history[-MAX_HISTORY:]:
-                    messages.append(msg)
+                client = get_openai_client()
                 
-                # Add current user message
-                messages.append({"role": "user", "content": message})
+                # Build messages array with system prompt, conversation history
+                # and the current user message
+                messages = [
+                    {"role": "system", "content": CHAT_SYSTEM_PROMPT},
+                    *conversation_history,
+                    {"role": "user", "content": message}
+                ]
                 
                 # Get response from OpenAI GPT
                 gpt_response = client.chat.completions.create(
@@ -244,32 +292,29 @@ Be helpful, concise, and focus on practical music production advice. If someone
                 # Check if this is a music generation request
                 music_generation_result = None
                 try:
-                    # Try to parse as JSON to check for music generation action
-                    response_data = json.loads(response)
-                    if response_data.get('action') == 'generate_music':
-                        logger.info("Detected music generation request")
+                    # Only a JSON object can carry an action; plain replies skip the parse
+                    if response.lstrip().startswith('{'):
+                        response_data = json.loads(response)
+                        if response_data.get('action') == 'generate_music':
+                            logger.info("Detected music generation request")
                         
-                        # Generate music using Beatoven.ai
-                        music_response = generate_music_internal(response_data.get('instructions', ''))
-                        if music_response.get('success'):
-                            music_generation_result = music_response
-                            response = response_data.get('response', 'Music generation completed!')
-                        else:
-                            response = f"Music generation failed: {music_response.get('error', 'Unknown error')}"
+                            # Generate music using Beatoven.ai
+                            music_response = generate_music_internal(response_data.get('instructions', ''))
+                            if music_response.get('success'):
+                                music_generation_result = music_response
+                                response = response_data.get('response', 'Music generation completed!')
+                            else:
+                                response = f"Music generation failed: {music_response.get('error', 'Unknown error')}"
                             
                 except (json.JSONDecodeError, KeyError) as e:
                     # Not a music generation request or invalid JSON, use normal response
                     logger.info(f"Not a music generation request or JSON parsing failed: {e}")
                     pass
                 
-                # Update conversation history
+                # Update conversation history (the deque drops the oldest messages)
                 conversation_history.append({"role": "user", "content": message})
                 conversation_history.append({"role": "assistant", "content": response})
                 
-                # Keep only the last MAX_HISTORY messages
-                if len(conversation_history) > MAX_HISTORY * 2:  # *2 because each exchange has 2 messages
-                    conversation_history = conversation_history[-MAX_HISTORY * 2:]
-                
             except Exception as e:
                 logger.error(f"OpenAI GPT error: {e}")
                 response = "I'm having trouble processing your request right now. Please try again."
@@ -277,7 +322,7 @@ Be helpful, concise, and focus on practical music production advice. If someone
         # Generate TTS for the response
         try:
             if OpenAI:
-                client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+                client = get_openai_client()
                 tts_response = client.audio.speech.create(
                     model="tts-1",
                     voice="alloy",
@@ -306,7 +351,6 @@ Be helpful, concise, and focus on practical music production advice. If someone
 def clear_conversation():
     """Clear conversation history"""
     try:
-        global conversation_history
         conversation_history.clear()
         logger.info("Conversation history cleared")
         
@@ -351,8 +395,8 @@ def generate_music():
         }
         
         # Send the request to Beatoven.ai music generation API
-        response = requests.post(
-            "https://public-api.beatoven.ai/api/v1/tracks/compose",
+        response = beatoven_session.post(
+            BEATOVEN_COMPOSE_URL,
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
@@ -380,8 +424,8 @@ def generate_music():
             time.sleep(5)  # Wait 5 seconds between checks
             
             # Check task status
-            status_response = requests.get(
-                f"https://public-api.beatoven.ai/api/v1/tasks/{task_id}",
+            status_response = beatoven_session.get(
+                f"{BEATOVEN_TASKS_URL}/{task_id}",
                 headers={"Authorization": f"Bearer {api_key}"}
             )
             
@@ -401,7 +445,7 @@ def generate_music():
                     return jsonify({'success': False, 'error': 'No track URL in response'})
                 
                 # Download the audio file
-                audio_response = requests.get(track_url)
+                audio_response = beatoven_session.get(track_url)
                 if audio_response.status_code != 200:
                     return jsonify({'success': False, 'error': 'Failed to download audio file'})
                 
@@ -423,13 +467,7 @@ def generate_music():
                 
                 # Import into REAPER if available
                 try:
-                    if 'reapy' in sys.modules:
-                        project = reapy.Project()
-                        
-                        # Add the generated audio file to REAPER
-                        track = project.add_track()
-                        track.add_item(0, output_path)
-                        
+                    if add_audio_to_reaper(output_path):
                         logger.info(f"Added {output_filename} to REAPER")
                         
                 except Exception as e:
@@ -482,8 +520,8 @@ def generate_music_internal(instructions):
         }
         
         # Send the request to Beatoven.ai music generation API
-        response = requests.post(
-            "https://public-api.beatoven.ai/api/v1/tracks/compose",
+        response = beatoven_session.post(
+            BEATOVEN_COMPOSE_URL,
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
@@ -511,8 +549,8 @@ def generate_music_internal(instructions):
             time.sleep(5)  # Wait 5 seconds between checks
             
             # Check task status
-            status_response = requests.get(
-                f"https://public-api.beatoven.ai/api/v1/tasks/{task_id}",
+            status_response = beatoven_session.get(
+                f"{BEATOVEN_TASKS_URL}/{task_id}",
                 headers={"Authorization": f"Bearer {api_key}"}
             )
             
@@ -532,7 +570,7 @@ def generate_music_internal(instructions):
                     return {'success': False, 'error': 'No track URL in response'}
                 
                 # Download the audio file
-                audio_response = requests.get(track_url)
+                audio_response = beatoven_session.get(track_url)
                 if audio_response.status_code != 200:
                     return {'success': False, 'error': 'Failed to download audio file'}
                 
@@ -554,13 +592,7 @@ def generate_music_internal(instructions):
                 
                 # Import into REAPER if available
                 try:
-                    if 'reapy' in sys.modules:
-                        project = reapy.Project()
-                        
-                        # Add the generated audio file to REAPER
-                        track = project.add_track()
-                        track.add_item(0, output_path)
-                        
+                    if add_audio_to_reaper(output_path):
                         logger.info(f"Added {output_filename} to REAPER")
                         
                 except Exception as e:
@@ -590,8 +622,6 @@ def generate_music_internal(instructions):
 def create_filename_from_prompt(prompt):
     """Create a filename based on the user's prompt"""
     # Clean the prompt for filename use
-    import re
-    
     # Remove special characters and convert to lowercase
     clean_name = re.sub(r'[^a-zA-Z0-9\s]', '', prompt.lower())
     
@@ -608,8 +638,6 @@ def create_filename_from_prompt(prompt):
 
 def generate_dynamic_audio(structured_instructions, sample_rate, duration):
     """Generate more dynamic audio based on structured instructions"""
-    import numpy as np
-    
     # Extract parameters from structured instructions
     tempo = structured_instructions.get('tempo', 120)
     genre = structured_instructions.get('genre', 'electronic').lower()
@@ -623,15 +651,9 @@ def generate_dynamic_audio(structured_instructions, sample_rate, duration):
     audio_data = np.zeros(total_samples)
     
     # Generate different audio based on genre and mood
-    if 'drum' in ' '.join(instruments).lower() or 'beat' in ' '.join(instruments).lower() or 'snare' in ' '.join(instruments).lower():
-        # Generate drum-like pattern
-        audio_data = generate_drum_pattern(sample_rate, duration, tempo, mood)
-    elif 'bass' in ' '.join(instruments).lower():
-        # Generate bass line
-        audio_data = generate_bass_line(sample_rate, duration, tempo, mood)
-    elif 'melody' in ' '.join(instruments).lower() or 'synth' in ' '.join(instruments).lower():
-        # Generate melodic content
-        audio_data = generate_melody(sample_rate, duration, tempo, mood)
+    generator = select_audio_generator(instruments)
+    if generator:
+        audio_data = generator(sample_rate, duration, tempo, mood)
     else:
         # Generate ambient/pad-like content
         audio_data = generate_ambient_pad(sample_rate, duration, mood)
@@ -645,10 +667,17 @@ def generate_dynamic_audio(structured_instructions, sample_rate, duration):
     
     return audio_data
 
+# Note frequencies (Hz) used by the fallback generators, picked by mood
+DARK_BASS_FREQS = (55, 65, 73, 82)  # A1, C2, D2, E2
+BASS_FREQS = (82, 98, 110, 123)  # E2, G2, A2, B2
+BRIGHT_MELODY_FREQS = (440, 494, 523, 587, 659, 698, 784)  # A4 to G5
+DARK_MELODY_FREQS = (220, 247, 262, 294, 330, 349, 392)  # A3 to G4
+MELODY_FREQS = (330, 370, 415, 440, 494, 523, 587)  # E4 to D5
+CALM_PAD_FREQS = (110, 165, 220, 330)  # A2, E3, A3, E4
+PAD_FREQS = (220, 330, 440, 660)  # A3, E4, A4, E5
+
 def generate_drum_pattern(sample_rate, duration, tempo, mood):
     """Generate a drum pattern"""
-    import numpy as np
-    
     total_samples = int(sample_rate * duration)
     audio_data = np.zeros(total_samples)
     
@@ -696,85 +725,98 @@ def generate_drum_pattern(sample_rate, duration, tempo, mood):
 
 def generate_bass_line(sample_rate, duration, tempo, mood):
     """Generate a bass line"""
-    import numpy as np
-    
     total_samples = int(sample_rate * duration)
     audio_data = np.zeros(total_samples)
     
     # Bass frequencies based on mood
     if 'dark' in mood or 'heavy' in mood:
-        bass_freqs = [55, 65, 73, 82]  # A1, C2, D2, E2
+        bass_freqs = DARK_BASS_FREQS
     else:
-        bass_freqs = [82, 98, 110, 123]  # E2, G2, A2, B2
+        bass_freqs = BASS_FREQS
     
     # Generate bass pattern
     beats_per_second = tempo / 60
     samples_per_beat = int(sample_rate / beats_per_second)
     
+    # Render each candidate note once; the per-beat loop only copies samples
+    t = np.linspace(0, 1/beats_per_second, samples_per_beat)
+    envelope = np.exp(-2 * t) * 0.4
+    bass_notes = {freq: np.sin(2 * np.pi * freq * t) * envelope for freq in bass_freqs}
+    
     for i in range(0, total_samples, samples_per_beat):
         if i + samples_per_beat < total_samples:
             freq = np.random.choice(bass_freqs)
-            t = np.linspace(0, 1/beats_per_second, samples_per_beat)
-            bass_note = np.sin(2 * np.pi * freq * t) * np.exp(-2 * t)
-            audio_data[i:i+samples_per_beat] += bass_note * 0.4
+            audio_data[i:i+samples_per_beat] += bass_notes[freq]
     
     return audio_data
 
 def generate_melody(sample_rate, duration, tempo, mood):
     """Generate a melodic line"""
-    import numpy as np
-    
     total_samples = int(sample_rate * duration)
     audio_data = np.zeros(total_samples)
     
     # Melody frequencies based on mood
     if 'happy' in mood or 'bright' in mood:
-        melody_freqs = [440, 494, 523, 587, 659, 698, 784]  # A4 to G5
+        melody_freqs = BRIGHT_MELODY_FREQS
     elif 'sad' in mood or 'dark' in mood:
-        melody_freqs = [220, 247, 262, 294, 330, 349, 392]  # A3 to G4
+        melody_freqs = DARK_MELODY_FREQS
     else:
-        melody_freqs = [330, 370, 415, 440, 494, 523, 587]  # E4 to D5
+        melody_freqs = MELODY_FREQS
     
     # Generate melody pattern
     beats_per_second = tempo / 60
     samples_per_beat = int(sample_rate / beats_per_second)
     
+    # Render each candidate note once; the per-note loop only copies samples
+    t = np.linspace(0, 2/beats_per_second, samples_per_beat * 2)
+    envelope = np.exp(-1 * t) * 0.3
+    melody_notes = {freq: np.sin(2 * np.pi * freq * t) * envelope for freq in melody_freqs}
+    
     for i in range(0, total_samples, samples_per_beat * 2):  # Every 2 beats
         if i + samples_per_beat < total_samples:
             freq = np.random.choice(melody_freqs)
-            t = np.linspace(0, 2/beats_per_second, samples_per_beat * 2)
-            melody_note = np.sin(2 * np.pi * freq * t) * np.exp(-1 * t)
-            audio_data[i:i+samples_per_beat*2] += melody_note * 0.3
+            audio_data[i:i+samples_per_beat*2] += melody_notes[freq]
     
     return audio_data
 
 def generate_ambient_pad(sample_rate, duration, mood):
     """Generate ambient pad-like content"""
-    import numpy as np
-    
     total_samples = int(sample_rate * duration)
     audio_data = np.zeros(total_samples)
     
     # Ambient frequencies based on mood
     if 'peaceful' in mood or 'ambient' in mood:
-        pad_freqs = [110, 165, 220, 330]  # A2, E3, A3, E4
+        pad_freqs = CALM_PAD_FREQS
     else:
-        pad_freqs = [220, 330, 440, 660]  # A3, E4, A4, E5
+        pad_freqs = PAD_FREQS
     
     # Generate layered pad
+    t = np.linspace(0, duration, total_samples)
+    # Add slow modulation (identical for every layer)
+    modulation = np.sin(2 * np.pi * 0.1 * t) * 0.05
     for freq in pad_freqs:
-        t = np.linspace(0, duration, total_samples)
         pad_layer = np.sin(2 * np.pi * freq * t) * 0.1
-        # Add slow modulation
-        modulation = np.sin(2 * np.pi * 0.1 * t) * 0.05
         audio_data += pad_layer + modulation
     
     return audio_data
 
+# Instrument keywords mapped to their generator, checked in priority order
+INSTRUMENT_GENERATORS = (
+    (('drum', 'beat', 'snare'), generate_drum_pattern),
+    (('bass',), generate_bass_line),
+    (('melody', 'synth'), generate_melody),
+)
+
+def select_audio_generator(instruments):
+    """Pick the audio generator for the requested instruments, or None for an ambient pad"""
+    instruments_text = ' '.join(instruments).lower()
+    for keywords, generator in INSTRUMENT_GENERATORS:
+        if any(keyword in instruments_text for keyword in keywords):
+            return generator
+    return None
+
 def extract_bpm_from_text(text):
     """Extract BPM from text input"""
-    import re
-    
     # Look for BPM patterns like "120 bpm", "120BPM", "120 BPM", etc.
     bpm_patterns = [
         r'(\d+)\s*bpm',  # 120 bpm
@@ -798,8 +840,6 @@ def extract_bpm_from_text(text):
 
 def create_fallback_instructions(instructions):
     """Create fallback structured instructions based on user input"""
-    import re
-    
     # Extract BPM if mentioned
     bpm = extract_bpm_from_text(instructions)
     if not bpm:
@@ -861,8 +901,6 @@ def create_fallback_instructions(instructions):
 
 def generate_fallback_audio(structured_instructions, sample_rate, duration):
     """Generate fallback audio if Beatoven.ai fails"""
-    import numpy as np
-    
     # Extract parameters from structured instructions
     tempo = structured_instructions.get('tempo', 120)
     genre = structured_instructions.get('genre', 'electronic').lower()
@@ -876,15 +914,9 @@ def generate_fallback_audio(structured_instructions, sample_rate, duration):
     audio_data = np.zeros(total_samples)
     
     # Generate different audio based on genre and mood
-    if 'drum' in ' '.join(instruments).lower() or 'beat' in ' '.join(instruments).lower() or 'snare' in ' '.join(instruments).lower():
-        # Generate drum-like pattern
-        audio_data = generate_drum_pattern(sample_rate, duration, tempo, mood)
-    elif 'bass' in ' '.join(instruments).lower():
-        # Generate bass line
-        audio_data = generate_bass_line(sample_rate, duration, tempo, mood)
-    elif 'melody' in ' '.join(instruments).lower() or 'synth' in ' '.join(instruments).lower():
-        # Generate melodic content
-        audio_data = generate_melody(sample_rate, duration, tempo, mood)
+    generator = select_audio_generator(instruments)
+    if generator:
+        audio_data = generator(sample_rate, duration, tempo, mood)
     else:
         # Generate ambient/pad-like content
         audio_data = generate_ambient_pad(sample_rate, duration, mood)
@@ -898,6 +930,39 @@ def generate_fallback_audio(structured_instructions, sample_rate, duration):
     
     return audio_data
 
+# Beatoven.ai prompt skeleton, filled in by create_instrument_aware_prompt
+BEATOVEN_PROMPT_TEMPLATE = """
+Generate a complete, professional instrumental track based on this request: {user_request}
+
+IMPORTANT REQUIREMENTS:
+- This is an INSTRUMENTAL track - NO vocals, NO lyrics, NO singing
+- Focus on musical composition and arrangement, not vocal elements
+- Create a full, balanced arrangement with all specified instruments
+
+{instrument_section}
+COMPOSITION GUIDELINES:
+- Create dynamic, evolving arrangements with clear sections
+- Include proper musical structure (intro, verse, bridge, etc.)
+- Ensure all instruments work together harmoniously
+- Add variation and progression throughout the track
+- Make it sound like professional studio production
+
+STYLE NOTES:
+- Match the requested genre and mood precisely
+- Use appropriate instrumentation for the style
+- Create authentic, genre-appropriate sounds
+- Ensure professional mixing and balance
+- Make each instrument distinct and well-defined in the mix
+
+PRODUCTION QUALITY:
+- Professional studio-grade sound quality
+- Clear separation between instruments
+- Balanced frequency spectrum
+- Dynamic range appropriate for the genre
+- Polished, radio-ready production
+""".strip()
+
+@functools.lru_cache(maxsize=256)
 def create_instrument_aware_prompt(user_request):
     """Create a detailed, instrument-aware prompt for Beatoven.ai based on user request"""
     
@@ -959,62 +1024,32 @@ def create_instrument_aware_prompt(user_request):
         default_instruments['lead'] = 'Electric guitar solos and melodic lines'
     
     # Analyze user request for instrument exclusions
-    excluded_instruments = []
+    excluded_instruments = set()
     
     # Check for instrument exclusions
     if any(phrase in user_request_lower for phrase in ['without drums', 'no drums', 'drumless']):
-        excluded_instruments.append('drums')
+        excluded_instruments.add('drums')
     if any(phrase in user_request_lower for phrase in ['without bass', 'no bass', 'bassless']):
-        excluded_instruments.append('bass')
+        excluded_instruments.add('bass')
     if any(phrase in user_request_lower for phrase in ['without guitar', 'no guitar', 'guitarless']):
-        excluded_instruments.append('rhythm')
-        excluded_instruments.append('lead')
+        excluded_instruments.add('rhythm')
+        excluded_instruments.add('lead')
     if any(phrase in user_request_lower for phrase in ['without keys', 'no keys', 'keyboardless']):
-        excluded_instruments.append('rhythm')
-        excluded_instruments.append('lead')
+        excluded_instruments.add('rhythm')
+        excluded_instruments.add('lead')
     
     # Build the instrument section
-    instrument_section = "INSTRUMENT LAYOUT:\n"
-    for instrument, description in default_instruments.items():
-        if instrument not in excluded_instruments:
-            instrument_section += f"- {description}\n"
+    instrument_lines = [f"- {description}" for instrument, description in default_instruments.items()
+                        if instrument not in excluded_instruments]
+    instrument_section = "INSTRUMENT LAYOUT:\n" + "\n".join(instrument_lines) + "\n"
     
     if excluded_instruments:
-        instrument_section += f"\nEXCLUDED INSTRUMENTS: {', '.join(excluded_instruments).title()}\n"
+        # List exclusions in layout order so the prompt is deterministic
+        excluded_names = [instrument for instrument in default_instruments if instrument in excluded_instruments]
+        instrument_section += f"\nEXCLUDED INSTRUMENTS: {', '.join(excluded_names).title()}\n"
     
     # Create the comprehensive prompt
-    prompt = f"""
-Generate a complete, professional instrumental track based on this request: {user_request}
-
-IMPORTANT REQUIREMENTS:
-- This is an INSTRUMENTAL track - NO vocals, NO lyrics, NO singing
-- Focus on musical composition and arrangement, not vocal elements
-- Create a full, balanced arrangement with all specified instruments
-
-{instrument_section}
-COMPOSITION GUIDELINES:
-- Create dynamic, evolving arrangements with clear sections
-- Include proper musical structure (intro, verse, bridge, etc.)
-- Ensure all instruments work together harmoniously
-- Add variation and progression throughout the track
-- Make it sound like professional studio production
-
-STYLE NOTES:
-- Match the requested genre and mood precisely
-- Use appropriate instrumentation for the style
-- Create authentic, genre-appropriate sounds
-- Ensure professional mixing and balance
-- Make each instrument distinct and well-defined in the mix
-
-PRODUCTION QUALITY:
-- Professional studio-grade sound quality
-- Clear separation between instruments
-- Balanced frequency spectrum
-- Dynamic range appropriate for the genre
-- Polished, radio-ready production
-"""
-    
-    return prompt.strip()
+    return BEATOVEN_PROMPT_TEMPLATE.format(user_request=user_request, instrument_section=instrument_section)
 
 if __name__ == "__main__":
     print("Starting Music Production Assistant Backend...")
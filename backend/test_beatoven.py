@@ -8,10 +8,48 @@ import requests
 import time
 import json
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Optional: faster JSON parsing/printing when orjson is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Load environment variables
 load_dotenv()
 
+# Beatoven.ai endpoints
+BEATOVEN_API_BASE = "https://public-api.beatoven.ai/api/v1"
+BEATOVEN_COMPOSE_URL = f"{BEATOVEN_API_BASE}/tracks/compose"
+BEATOVEN_TASKS_URL = f"{BEATOVEN_API_BASE}/tasks"
+
+# Beatoven's JSON responses are a few hundred bytes; anything near this is a broken server
+MAX_RESPONSE_BYTES = 1 << 20
+
+def format_json(data):
+    """Pretty-print JSON for the test output"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+def read_json_capped(response):
+    """Parse a streamed JSON response, giving up once it exceeds MAX_RESPONSE_BYTES"""
+    content_length = int(response.headers.get("Content-Length") or 0)
+    if content_length > MAX_RESPONSE_BYTES:
+        response.close()
+        raise ValueError(f"Response too large: {content_length} bytes")
+    
+    # Content-Length can be missing (chunked responses), so also cap while reading
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        body += chunk
+        if len(body) > MAX_RESPONSE_BYTES:
+            response.close()
+            raise ValueError(f"Response too large: over {MAX_RESPONSE_BYTES} bytes")
+    return orjson.loads(body) if orjson else json.loads(body)
+
 def test_beatoven_ai():
     """Test Beatoven.ai API connection and music generation"""
     
@@ -37,46 +75,56 @@ def test_beatoven_ai():
         "format": "wav",
         "looping": False
     }
+    # Serialize once; a retried POST resends the same bytes
+    body = json.dumps(payload).encode()
     
     print(f"\n📝 Testing composition request...")
     print(f"Prompt: {test_prompt}")
     
+    # One keep-alive session for the compose request and every status poll
+    session = requests.Session()
+    session.headers.update({"Authorization": f"Bearer {api_key}"})
+    session.mount("https://", HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=4,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+    ))
+    
     try:
         # Send composition request
-        response = requests.post(
-            "https://public-api.beatoven.ai/api/v1/tracks/compose",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json=payload,
-            timeout=30
+        response = session.post(
+            BEATOVEN_COMPOSE_URL,
+            data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=30,
+            stream=True
         )
         
         print(f"Response Status: {response.status_code}")
         
         if response.status_code == 200:
-            response_data = response.json()
+            response_data = read_json_capped(response)
             print(f"✅ Composition request successful!")
-            print(f"Response: {json.dumps(response_data, indent=2)}")
+            print(f"Response: {format_json(response_data)}")
             
             if response_data.get('status') in ['started', 'composing'] and 'task_id' in response_data:
                 task_id = response_data['task_id']
                 print(f"\n🔄 Task ID: {task_id}")
                 print("Testing status polling...")
                 
-                # Test status polling (just a few attempts)
-                for attempt in range(3):
-                    time.sleep(2)
+                # Test status polling (just a few attempts), backing off 0.5s, 1s, 2s, 4s
+                delay = 0.5
+                for attempt in range(4):
+                    time.sleep(delay)
                     
-                    status_response = requests.get(
-                        f"https://public-api.beatoven.ai/api/v1/tasks/{task_id}",
-                        headers={"Authorization": f"Bearer {api_key}"},
-                        timeout=10
+                    status_response = session.get(
+                        f"{BEATOVEN_TASKS_URL}/{task_id}",
+                        timeout=10,
+                        stream=True
                     )
                     
                     if status_response.status_code == 200:
-                        status_data = status_response.json()
+                        status_data = read_json_capped(status_response)
                         status = status_data.get('status')
                         print(f"Status check {attempt + 1}: {status}")
                         
@@ -92,6 +140,10 @@ def test_beatoven_ai():
                     else:
                         print(f"❌ Status check failed: {status_response.status_code}")
                         break
+                    
+                    # Honour the server's hint (up to 8s) if it gives one, otherwise double the wait
+                    retry_after = status_response.headers.get("Retry-After", "")
+                    delay = min(float(retry_after), 8.0) if retry_after.isdigit() else min(delay * 2, 8.0)
                 
                 print("\n✅ Beatoven.ai API is working correctly!")
                 return True
@@ -120,6 +172,8 @@ def test_beatoven_ai():
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
         return False
+    finally:
+        session.close()
 
 def test_environment():
     """Test environment setup"""
@@ -0,0 +1,30 @@
+"""
+Cached environment access shared by the test scripts
+"""
+
+import os
+from functools import lru_cache
+from pathlib import Path
+
+def load_env_file(path=None):
+    """Load a .env file once per process; later calls for the same file are no-ops"""
+    from dotenv import find_dotenv
+    # Normalise first so None, relative and absolute spellings of one file share a cache entry
+    path = path or find_dotenv()
+    if not path:
+        return False
+    return _load_env_file(os.path.realpath(path))
+
+@lru_cache(maxsize=None)
+def _load_env_file(path):
+    from dotenv import load_dotenv
+    return load_dotenv(path)
+
+def env(key, default=None):
+    """Read an environment variable (load .env files first)"""
+    return os.environ.get(key, default)
+
+@lru_cache(maxsize=8)
+def dotenv_present(path=".env"):
+    """Check once per process whether a .env file exists at path"""
+    return Path(path).is_file()
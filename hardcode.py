@@ -4,11 +4,12 @@ REAPER Control with Claude API Tool Calls
 Handles track management and FX operations using reapy
 """
 
+import inspect
 import json
 import logging
 import os
+import time
 from typing import Dict, Any, List
-import reapy
 
 # Load environment variables
 try:
@@ -17,321 +18,414 @@ try:
 except ImportError:
     print("Warning: python-dotenv not found. Install with: pip install python-dotenv")
 
-# Anthropic Claude API
+# Optional: compiled JSON schema validation for tool inputs
 try:
-    import anthropic
+    import fastjsonschema
 except ImportError:
-    print("Error: anthropic not found. Please install with: pip install anthropic")
-    anthropic = None
+    fastjsonschema = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global project instance - hardcoded as requested
-try:
-    project = reapy.Project()
-    logger.info("Connected to REAPER project")
-except Exception as e:
-    logger.error(f"Failed to connect to REAPER: {e}")
-    project = None
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
 
-class ReaperController:
-    def __init__(self):
-        self.track_counter = 1
-        self.client = None
-        self.setup_claude()
-        
-        # Define tools for Claude
-        self.tools = [
-            {
-                "name": "add_track",
-                "description": "Add a new track to REAPER project",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_name": {
-                            "type": "string",
-                            "description": "Name for the new track"
-                        }
-                    },
-                    "required": ["track_name"]
+# Tool results from the latest rounds are resent in full; older ones are cut to this length
+FULL_RESULT_ROUNDS = 2
+COMPACT_RESULT_CHARS = 200
+
+# Tool-calling rounds kept in the conversation resent to Claude, besides the original request
+MAX_HISTORY_ROUNDS = 4
+
+# Valid MIDI pitch/velocity and channel values
+MIDI_VALUE_RANGE = range(128)
+MIDI_CHANNEL_RANGE = range(16)
+
+# Note name for every MIDI pitch, e.g. 60 -> "C4"
+_NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+_PITCH_NAMES = tuple(_NOTE_NAMES[pitch % 12] + str((pitch // 12) - 1) for pitch in range(128))
+
+# Whole-octave transpositions, covering every shift that stays within the MIDI range
+_OCTAVE_DESCRIPTIONS = {
+    12: "up one octave",
+    -12: "down one octave",
+    **{octaves * 12: f"up {octaves} octaves" for octaves in range(2, 11)},
+    **{-octaves * 12: f"down {octaves} octaves" for octaves in range(2, 11)},
+}
+
+# Raw parameter values sampled when mapping a formatted value back to a parameter
+_CALIBRATION_POINTS = (0.0, 0.5, 1.0)
+
+# Tools that only read project state; every other tool may change it
+READ_ONLY_TOOLS = frozenset({"list_tracks", "list_fx_on_track", "inspect_fx_parameters", "list_notes_on_track"})
+
+# Tool definitions for Claude, shared by every controller
+TOOLS = [
+    {
+        "name": "add_track",
+        "description": "Add a new track to REAPER project",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_name": {
+                    "type": "string",
+                    "description": "Name for the new track"
                 }
             },
-            {
-                "name": "delete_track",
-                "description": "Delete a track from REAPER project",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index to delete"
-                        }
-                    },
-                    "required": ["track_identifier"]
+            "required": ["track_name"]
+        }
+    },
+    {
+        "name": "delete_track",
+        "description": "Delete a track from REAPER project",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index to delete"
                 }
             },
-            {
-                "name": "add_fx_to_track",
-                "description": "Add an FX plugin to a track",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "fx_name": {
-                            "type": "string",
-                            "description": "Name of the FX plugin to add (e.g., 'ReaSynth', 'ReaEQ', 'ReaComp')"
-                        }
-                    },
-                    "required": ["track_identifier", "fx_name"]
+            "required": ["track_identifier"]
+        }
+    },
+    {
+        "name": "add_fx_to_track",
+        "description": "Add an FX plugin to a track",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "fx_name": {
+                    "type": "string",
+                    "description": "Name of the FX plugin to add (e.g., 'ReaSynth', 'ReaEQ', 'ReaComp')"
                 }
             },
-            {
-                "name": "remove_fx_from_track",
-                "description": "Remove an FX plugin from a track",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "fx_index": {
-                            "type": "integer",
-                            "description": "Index of the FX to remove (0-based)"
-                        }
-                    },
-                    "required": ["track_identifier", "fx_index"]
+            "required": ["track_identifier", "fx_name"]
+        }
+    },
+    {
+        "name": "remove_fx_from_track",
+        "description": "Remove an FX plugin from a track",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "fx_index": {
+                    "type": "integer",
+                    "description": "Index of the FX to remove (0-based)"
                 }
             },
-            {
-                "name": "list_tracks",
-                "description": "List all tracks in the project",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {}
+            "required": ["track_identifier", "fx_index"]
+        }
+    },
+    {
+        "name": "list_tracks",
+        "description": "List all tracks in the project",
+        "input_schema": {
+            "type": "object",
+            "properties": {}
+        }
+    },
+    {
+        "name": "list_fx_on_track",
+        "description": "List all FX plugins on a specific track",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
                 }
             },
-            {
-                "name": "list_fx_on_track",
-                "description": "List all FX plugins on a specific track",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        }
-                    },
-                    "required": ["track_identifier"]
+            "required": ["track_identifier"]
+        }
+    },
+    {
+        "name": "inspect_fx_parameters",
+        "description": "Inspect all parameters of a specific FX on a track",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "fx_index": {
+                    "type": "integer",
+                    "description": "Index of the FX to inspect (0-based)"
                 }
             },
-            {
-                "name": "inspect_fx_parameters",
-                "description": "Inspect all parameters of a specific FX on a track",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "fx_index": {
-                            "type": "integer",
-                            "description": "Index of the FX to inspect (0-based)"
-                        }
-                    },
-                    "required": ["track_identifier", "fx_index"]
+            "required": ["track_identifier", "fx_index"]
+        }
+    },
+    {
+        "name": "set_fx_parameter",
+        "description": "Set a specific parameter value for an FX. IMPORTANT: Always inspect FX parameters first to find the correct parameter index before setting values.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "fx_index": {
+                    "type": "integer",
+                    "description": "Index of the FX (0-based)"
+                },
+                "param_index": {
+                    "type": "integer",
+                    "description": "Index of the parameter (0-based) - use inspect_fx_parameters first to find the correct index"
+                },
+                "value": {
+                    "type": "number",
+                    "description": "Parameter value - can be either raw parameter value (0.0-1.0) OR human-readable formatted value (e.g., 3000 for 3000ms)"
+                },
+                "use_formatted": {
+                    "type": "boolean",
+                    "description": "If true, treat 'value' as a formatted/human-readable value that needs conversion to parameter range. If false, use raw parameter value.",
+                    "default": True
                 }
             },
-            {
-                "name": "set_fx_parameter",
-                "description": "Set a specific parameter value for an FX. IMPORTANT: Always inspect FX parameters first to find the correct parameter index before setting values.",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "fx_index": {
-                            "type": "integer",
-                            "description": "Index of the FX (0-based)"
-                        },
-                        "param_index": {
-                            "type": "integer",
-                            "description": "Index of the parameter (0-based) - use inspect_fx_parameters first to find the correct index"
-                        },
-                        "value": {
-                            "type": "number",
-                            "description": "Parameter value - can be either raw parameter value (0.0-1.0) OR human-readable formatted value (e.g., 3000 for 3000ms)"
-                        },
-                        "use_formatted": {
-                            "type": "boolean",
-                            "description": "If true, treat 'value' as a formatted/human-readable value that needs conversion to parameter range. If false, use raw parameter value.",
-                            "default": True
-                        }
-                    },
-                    "required": ["track_identifier", "fx_index", "param_index", "value"]
+            "required": ["track_identifier", "fx_index", "param_index", "value"]
+        }
+    },
+    {
+        "name": "modify_fx_parameter",
+        "description": "Modify an FX parameter by multiplying current value or setting absolute value. IMPORTANT: Always inspect FX parameters first to find the correct parameter index.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "fx_index": {
+                    "type": "integer",
+                    "description": "Index of the FX (0-based)"
+                },
+                "param_index": {
+                    "type": "integer",
+                    "description": "Index of the parameter (0-based)"
+                },
+                "operation": {
+                    "type": "string",
+                    "enum": ["multiply", "set"],
+                    "description": "Operation to perform: 'multiply' to multiply current value, 'set' to set absolute value"
+                },
+                "value": {
+                    "type": "number",
+                    "description": "For 'multiply': factor to multiply by (e.g., 1.5). For 'set': absolute value to set (0.0 to 1.0)"
                 }
             },
-            {
-                "name": "modify_fx_parameter",
-                "description": "Modify an FX parameter by multiplying current value or setting absolute value. IMPORTANT: Always inspect FX parameters first to find the correct parameter index.",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "fx_index": {
-                            "type": "integer",
-                            "description": "Index of the FX (0-based)"
-                        },
-                        "param_index": {
-                            "type": "integer",
-                            "description": "Index of the parameter (0-based)"
-                        },
-                        "operation": {
-                            "type": "string",
-                            "enum": ["multiply", "set"],
-                            "description": "Operation to perform: 'multiply' to multiply current value, 'set' to set absolute value"
-                        },
-                        "value": {
-                            "type": "number",
-                            "description": "For 'multiply': factor to multiply by (e.g., 1.5). For 'set': absolute value to set (0.0 to 1.0)"
-                        }
-                    },
-                    "required": ["track_identifier", "fx_index", "param_index", "operation", "value"]
+            "required": ["track_identifier", "fx_index", "param_index", "operation", "value"]
+        }
+    },
+    {
+        "name": "add_midi_item",
+        "description": "Add a MIDI item to a track",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "start_time": {
+                    "type": "number",
+                    "description": "Start time of the MIDI item in seconds",
+                    "default": 0
+                },
+                "end_time": {
+                    "type": "number",
+                    "description": "End time of the MIDI item in seconds",
+                    "default": 4
                 }
             },
-            {
-                "name": "add_midi_item",
-                "description": "Add a MIDI item to a track",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "start_time": {
-                            "type": "number",
-                            "description": "Start time of the MIDI item in seconds",
-                            "default": 0
-                        },
-                        "end_time": {
-                            "type": "number",
-                            "description": "End time of the MIDI item in seconds",
-                            "default": 4
-                        }
-                    },
-                    "required": ["track_identifier"]
+            "required": ["track_identifier"]
+        }
+    },
+    {
+        "name": "add_note_to_track",
+        "description": "Add a MIDI note to the active MIDI item on a track",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "start_time": {
+                    "type": "number",
+                    "description": "Note start time in seconds"
+                },
+                "end_time": {
+                    "type": "number",
+                    "description": "Note end time in seconds"
+                },
+                "pitch": {
+                    "type": "integer",
+                    "description": "MIDI pitch (0-127, where 60 = C4)"
+                },
+                "velocity": {
+                    "type": "integer",
+                    "description": "Note velocity (0-127)",
+                    "default": 100
+                },
+                "channel": {
+                    "type": "integer",
+                    "description": "MIDI channel (0-15)",
+                    "default": 0
                 }
             },
-            {
-                "name": "add_note_to_track",
-                "description": "Add a MIDI note to the active MIDI item on a track",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "start_time": {
-                            "type": "number",
-                            "description": "Note start time in seconds"
-                        },
-                        "end_time": {
-                            "type": "number",
-                            "description": "Note end time in seconds"
-                        },
-                        "pitch": {
-                            "type": "integer",
-                            "description": "MIDI pitch (0-127, where 60 = C4)"
-                        },
-                        "velocity": {
-                            "type": "integer",
-                            "description": "Note velocity (0-127)",
-                            "default": 100
-                        },
-                        "channel": {
-                            "type": "integer",
-                            "description": "MIDI channel (0-15)",
-                            "default": 0
-                        }
-                    },
-                    "required": ["track_identifier", "start_time", "end_time", "pitch"]
+            "required": ["track_identifier", "start_time", "end_time", "pitch"]
+        }
+    },
+    {
+        "name": "list_notes_on_track",
+        "description": "List all MIDI notes on a track",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "item_index": {
+                    "type": "integer",
+                    "description": "Index of the MIDI item (0-based). If not specified, uses the first MIDI item",
+                    "default": 0
                 }
             },
-            {
-                "name": "list_notes_on_track",
-                "description": "List all MIDI notes on a track",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "item_index": {
-                            "type": "integer",
-                            "description": "Index of the MIDI item (0-based). If not specified, uses the first MIDI item",
-                            "default": 0
-                        }
-                    },
-                    "required": ["track_identifier"]
+            "required": ["track_identifier"]
+        }
+    },
+    {
+        "name": "transpose_notes",
+        "description": "Transpose all notes on a track by a specified number of semitones",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "semitones": {
+                    "type": "integer",
+                    "description": "Number of semitones to transpose (positive = up, negative = down, 12 = one octave)"
+                },
+                "item_index": {
+                    "type": "integer",
+                    "description": "Index of the MIDI item (0-based). If not specified, transposes all MIDI items",
+                    "default": -1
                 }
             },
-            {
-                "name": "transpose_notes",
-                "description": "Transpose all notes on a track by a specified number of semitones",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "semitones": {
-                            "type": "integer",
-                            "description": "Number of semitones to transpose (positive = up, negative = down, 12 = one octave)"
-                        },
-                        "item_index": {
-                            "type": "integer",
-                            "description": "Index of the MIDI item (0-based). If not specified, transposes all MIDI items",
-                            "default": -1
-                        }
-                    },
-                    "required": ["track_identifier", "semitones"]
+            "required": ["track_identifier", "semitones"]
+        }
+    },
+    {
+        "name": "add_multiple_notes",
+        "description": "Add multiple MIDI notes to a track at once. Use this to add several notes in one operation.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "track_identifier": {
+                    "type": "string",
+                    "description": "Track name or index"
+                },
+                "note_data": {
+                    "type": "string",
+                    "description": "Comma-separated note data in format: 'pitch,start,end,velocity|pitch,start,end,velocity|...' where pitch=0-127, start/end=seconds, velocity=0-127 (optional, default 100). Example: '60,0,1,100|64,1,2,100|67,2,3,100' for C4, E4, G4 notes"
                 }
             },
-            {
-                "name": "add_multiple_notes",
-                "description": "Add multiple MIDI notes to a track at once. Use this to add several notes in one operation.",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "track_identifier": {
-                            "type": "string",
-                            "description": "Track name or index"
-                        },
-                        "note_data": {
-                            "type": "string",
-                            "description": "Comma-separated note data in format: 'pitch,start,end,velocity|pitch,start,end,velocity|...' where pitch=0-127, start/end=seconds, velocity=0-127 (optional, default 100). Example: '60,0,1,100|64,1,2,100|67,2,3,100' for C4, E4, G4 notes"
-                        }
-                    },
-                    "required": ["track_identifier", "note_data"]
-                }
+            "required": ["track_identifier", "note_data"]
+        },
+        # Cache breakpoint: the tool definitions are identical on every turn
+        "cache_control": {"type": "ephemeral"}
+    }
+]
+
+def _read_attr(obj, name: str):
+    """Read an optional reapy attribute, returning None if it isn't supported"""
+    try:
+        return getattr(obj, name)
+    except Exception:
+        return None
+
+def _format_optional(value, spec: str = "") -> str:
+    """Format a value read with _read_attr, or say it isn't available"""
+    return "Not available" if value is None else format(value, spec)
+
+def _format_range(min_val, max_val) -> str:
+    """Format a parameter range read with _read_attr"""
+    if min_val is None or max_val is None:
+        return "Not available"
+    return f"{min_val:.3f} to {max_val:.3f}"
+
+def _interpolate_param_value(samples, target_formatted_value: float) -> float:
+    """Map a formatted value back to a 0.0-1.0 parameter value from (param, formatted) samples"""
+    # Linear interpolation within the segment that brackets the target
+    for (p0, f0), (p1, f1) in zip(samples, samples[1:]):
+        if f0 != f1 and min(f0, f1) <= target_formatted_value <= max(f0, f1):
+            return p0 + (target_formatted_value - f0) * (p1 - p0) / (f1 - f0)
+    
+    # Out of range: clamp to whichever end is closest
+    return min(samples, key=lambda sample: abs(sample[1] - target_formatted_value))[0]
+
+class ReaperController:
+    def __init__(self):
+        self.track_counter = 1
+        self.client = None
+        self._tracks = None
+        self._tracks_by_name = {}
+        self._read_cache = {}
+        self._param_calibration = {}
+        self._track_context = None
+        # reapy and anthropic are imported here rather than at module level, so importing
+        # this module doesn't need REAPER running or the Claude SDK installed
+        self._reapy = None
+        self._rpr = None
+        self.project = self.connect_reaper()
+        self.setup_claude()
+        
+        self.tools = TOOLS
+        
+        # Resolve tool handlers and their argument names once instead of per call
+        self._dispatch = {tool["name"]: getattr(self, tool["name"]) for tool in self.tools}
+        self._required_args = {
+            tool["name"]: frozenset(tool["input_schema"].get("required", ()))
+            for tool in self.tools
+        }
+        self._tool_args = {
+            name: frozenset(inspect.signature(handler).parameters)
+            for name, handler in self._dispatch.items()
+        }
+        self._validators = {}
+        if fastjsonschema:
+            self._validators = {
+                tool["name"]: fastjsonschema.compile(tool["input_schema"])
+                for tool in self.tools
             }
-            
-        ]
+    
+    def connect_reaper(self):
+        """Connect to the current REAPER project, returning None if it isn't reachable"""
+        try:
+            import reapy
+            from reapy import reascript_api
+            self._reapy = reapy
+            self._rpr = reascript_api
+            project = reapy.Project()
+            logger.info("Connected to REAPER project")
+            return project
+        except Exception as e:
+            logger.error(f"Failed to connect to REAPER: {e}")
+            return None
     
     def setup_claude(self):
         """Setup Claude API client"""
@@ -342,8 +436,19 @@ class ReaperController:
                 logger.warning("ANTHROPIC_API_KEY=your-api-key-here")
                 return
             
+            try:
+                import anthropic
+                import httpx
+            except ImportError:
+                anthropic = None
+                logger.error("anthropic not found. Please install with: pip install anthropic")
+            
             if anthropic and api_key:
-                self.client = anthropic.Anthropic(api_key=api_key)
+                # Keep connections alive between the rounds of a tool chain and across queries
+                http_client = anthropic.DefaultHttpxClient(
+                    limits=httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=60.0)
+                )
+                self.client = anthropic.Anthropic(api_key=api_key, http_client=http_client)
                 logger.info("Claude API configured successfully")
             else:
                 logger.warning("Claude API not available")
@@ -352,11 +457,12 @@ class ReaperController:
     
     def add_track(self, track_name: str) -> str:
         """Add a new track to REAPER"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
-            new_track = project.add_track(name=track_name)
+            new_track = self.project.add_track(name=track_name)
+            self._invalidate_track_cache()
             logger.info(f"Created track: {track_name}")
             return f"Successfully created track: '{track_name}'"
         except Exception as e:
@@ -364,33 +470,18 @@ class ReaperController:
     
     def delete_track(self, track_identifier: str) -> str:
         """Delete a track from REAPER"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
-            # Try to find track by name first, then by index
-            track = None
-            
-            # Search by name
-            for t in project.tracks:
-                if t.name == track_identifier:
-                    track = t
-                    break
-            
-            # If not found by name, try by index
-            if not track:
-                try:
-                    track_index = int(track_identifier)
-                    if 0 <= track_index < len(project.tracks):
-                        track = project.tracks[track_index]
-                except ValueError:
-                    pass
-            
+            track = self._find_track(track_identifier)
             if not track:
                 return f"Track '{track_identifier}' not found"
             
             track_name = track.name
             track.delete()
+            self._param_calibration.clear()
+            self._invalidate_track_cache()
             logger.info(f"Deleted track: {track_name}")
             return f"Successfully deleted track: '{track_name}'"
             
@@ -399,7 +490,7 @@ class ReaperController:
     
     def add_fx_to_track(self, track_identifier: str, fx_name: str) -> str:
         """Add FX to a track"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -408,17 +499,18 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
+            track_name = track.name
             # Add FX
             fx = track.add_fx(name=fx_name)
-            logger.info(f"Added FX '{fx_name}' to track '{track.name}'")
-            return f"Successfully added '{fx_name}' to track '{track.name}'"
+            logger.info(f"Added FX '{fx_name}' to track '{track_name}'")
+            return f"Successfully added '{fx_name}' to track '{track_name}'"
             
         except Exception as e:
             return f"Error adding FX: {str(e)}"
     
     def remove_fx_from_track(self, track_identifier: str, fx_index: int) -> str:
         """Remove FX from a track"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -427,43 +519,48 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
+            track_name = track.name
             # Check if FX index is valid
-            if fx_index < 0 or fx_index >= len(track.fxs):
-                return f"FX index {fx_index} is out of range (0-{len(track.fxs)-1})"
+            fx_count = len(track.fxs)
+            if fx_index < 0 or fx_index >= fx_count:
+                return f"FX index {fx_index} is out of range (0-{fx_count-1})"
             
             # Remove FX
             fx = track.fxs[fx_index]
             fx_name = fx.name if hasattr(fx, 'name') else f"FX {fx_index}"
             fx.delete()
-            logger.info(f"Removed FX '{fx_name}' from track '{track.name}'")
-            return f"Successfully removed FX at index {fx_index} from track '{track.name}'"
+            # Later FX shift down an index, so their calibrations no longer line up
+            self._param_calibration.clear()
+            logger.info(f"Removed FX '{fx_name}' from track '{track_name}'")
+            return f"Successfully removed FX at index {fx_index} from track '{track_name}'"
             
         except Exception as e:
             return f"Error removing FX: {str(e)}"
     
     def list_tracks(self) -> str:
         """List all tracks in the project"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
-            if not project.tracks:
-                return "No tracks found in project"
+            # Read every name and FX count in one batch, format afterwards
+            with self._reapy.inside_reaper():
+                track_rows = [(track.name, len(track.fxs)) for track in self.project.tracks]
             
-            track_list = []
-            for i, track in enumerate(project.tracks):
-                fx_count = len(track.fxs)
-                track_info = f"{i}: '{track.name}' ({fx_count} FX)"
-                track_list.append(track_info)
+            if not track_rows:
+                return "No tracks found in project"
             
-            return "Tracks in project:\n" + "\n".join(track_list)
+            return "Tracks in project:\n" + "\n".join(
+                f"{i}: '{track_name}' ({fx_count} FX)"
+                for i, (track_name, fx_count) in enumerate(track_rows)
+            )
             
         except Exception as e:
             return f"Error listing tracks: {str(e)}"
     
     def list_fx_on_track(self, track_identifier: str) -> str:
         """List all FX plugins on a specific track"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -472,26 +569,25 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
-            if not track.fxs:
-                return f"No FX found on track '{track.name}'"
-            
-            fx_list = []
-            fx_list.append(f"FX on track '{track.name}':")
-            fx_list.append("-" * 40)
+            with self._reapy.inside_reaper():
+                track_name = track.name
+                fx_rows = [
+                    (fx.name, len(fx.params) if hasattr(fx, 'params') else 0)
+                    for fx in track.fxs
+                ]
             
-            for i, fx in enumerate(track.fxs):
-                param_count = len(fx.params) if hasattr(fx, 'params') else 0
-                fx_info = f"{i}: {fx.name} ({param_count} parameters)"
-                fx_list.append(fx_info)
+            if not fx_rows:
+                return f"No FX found on track '{track_name}'"
             
-            return "\n".join(fx_list)
+            fx_list = [f"{i}: {fx_name} ({param_count} parameters)" for i, (fx_name, param_count) in enumerate(fx_rows)]
+            return f"FX on track '{track_name}':\n" + "-" * 40 + "\n" + "\n".join(fx_list)
             
         except Exception as e:
             return f"Error listing FX: {str(e)}"
     
     def inspect_fx_parameters(self, track_identifier: str, fx_index: int) -> str:
         """Inspect all parameters of a specific FX on a track"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -500,55 +596,46 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
-            # Check if FX index is valid
-            if fx_index < 0 or fx_index >= len(track.fxs):
-                return f"FX index {fx_index} is out of range (0-{len(track.fxs)-1})"
-            
-            fx = track.fxs[fx_index]
-            
-            # Build detailed parameter information
-            result = []
-            result.append(f"FX: {fx.name}")
-            result.append(f"Track: {track.name}")
-            result.append(f"Number of parameters: {len(fx.params)}")
-            result.append("-" * 50)
-            
-            for i, param in enumerate(fx.params):
-                param_info = [f"Param {i}: {param.name} = {param:.3f}"]
-                
-                # Try to get formatted value if supported
-                try:
-                    formatted_value = param.formatted
-                    param_info.append(f"  Formatted: {formatted_value}")
-                except:
-                    param_info.append(f"  Formatted: Not available")
-                
-                # Try to get normalized value
-                try:
-                    normalized_value = param.normalized
-                    param_info.append(f"  Normalized: {normalized_value:.3f}")
-                except:
-                    param_info.append(f"  Normalized: Not available")
+            # Read everything in one batch; attributes a plugin doesn't support come back as None
+            with self._reapy.inside_reaper():
+                fx_count = len(track.fxs)
                 
-                # Try to get min/max values
-                try:
-                    min_val = param.min
-                    max_val = param.max
-                    param_info.append(f"  Range: {min_val:.3f} to {max_val:.3f}")
-                except:
-                    param_info.append(f"  Range: Not available")
+                # Check if FX index is valid
+                if fx_index < 0 or fx_index >= fx_count:
+                    return f"FX index {fx_index} is out of range (0-{fx_count-1})"
                 
-                result.extend(param_info)
-                result.append("")  # Empty line for readability
-            
-            return "\n".join(result)
+                fx = track.fxs[fx_index]
+                fx_name = fx.name
+                track_name = track.name
+                param_rows = [
+                    (
+                        param.name,
+                        float(param),
+                        _read_attr(param, 'formatted'),
+                        _read_attr(param, 'normalized'),
+                        _read_attr(param, 'min'),
+                        _read_attr(param, 'max'),
+                    )
+                    for param in fx.params
+                ]
+            
+            # Build detailed parameter information, one block per parameter
+            header = f"FX: {fx_name}\nTrack: {track_name}\nNumber of parameters: {len(param_rows)}\n" + "-" * 50
+            blocks = (
+                f"Param {i}: {param_name} = {value:.3f}\n"
+                f"  Formatted: {_format_optional(formatted_value)}\n"
+                f"  Normalized: {_format_optional(normalized_value, '.3f')}\n"
+                f"  Range: {_format_range(min_val, max_val)}\n"  # Empty line for readability
+                for i, (param_name, value, formatted_value, normalized_value, min_val, max_val) in enumerate(param_rows)
+            )
+            return "\n".join((header, *blocks))
             
         except Exception as e:
             return f"Error inspecting FX parameters: {str(e)}"
     
     def set_fx_parameter(self, track_identifier: str, fx_index: int, param_index: int, value: float, use_formatted: bool = True) -> str:
         """Set a specific parameter value for an FX"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -557,51 +644,49 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
-            # Check if FX index is valid
-            if fx_index < 0 or fx_index >= len(track.fxs):
-                return f"FX index {fx_index} is out of range (0-{len(track.fxs)-1})"
-            
-            fx = track.fxs[fx_index]
-            logger.info(f"Found FX: {fx.name}, type: {type(fx)}")
-            
-            # Check if parameter index is valid
-            if param_index < 0 or param_index >= len(fx.params):
-                return f"Parameter index {param_index} is out of range (0-{len(fx.params)-1})"
-            
-            param = fx.params[param_index]
-            logger.info(f"Found param: {param.name}, type: {type(param)}")
-            
-            old_value = float(param)
-            logger.info(f"Got old value: {old_value}")
+            # Do the whole read/modify/write in one batch and keep what we need in locals
+            with self._reapy.inside_reaper():
+                fx_count = len(track.fxs)
+                
+                # Check if FX index is valid
+                if fx_index < 0 or fx_index >= fx_count:
+                    return f"FX index {fx_index} is out of range (0-{fx_count-1})"
+                
+                fx = track.fxs[fx_index]
+                fx_name = fx.name
+                param_count = len(fx.params)
+                
+                # Check if parameter index is valid
+                if param_index < 0 or param_index >= param_count:
+                    return f"Parameter index {param_index} is out of range (0-{param_count-1})"
+                
+                param = fx.params[param_index]
+                param_name = param.name
+                old_value = float(param)
+                
+                # Convert formatted value to parameter value if needed
+                if use_formatted:
+                    actual_value_to_set = self._convert_formatted_to_param_value(param, value)
+                else:
+                    actual_value_to_set = value
+                
+                # Set parameter directly using fx.params[index] = value (this works!)
+                fx.params[param_index] = actual_value_to_set
+                
+                # Param objects hold the value they were read with, so read it back fresh
+                new_value = float(fx.params[param_index])
+                new_formatted = _read_attr(param, 'formatted')
             
-            # Convert formatted value to parameter value if needed
             if use_formatted:
-                converted_value = self._convert_formatted_to_param_value(param, value)
-                logger.info(f"Converted formatted value {value} to parameter value {converted_value}")
-                actual_value_to_set = converted_value
-            else:
-                actual_value_to_set = value
-            
-            logger.info(f"Setting parameter value to: {actual_value_to_set}")
-            
-            # Set parameter directly using fx.params[index] = value (this works!)
-            fx.params[param_index] = actual_value_to_set
-            logger.info("Successfully set parameter using fx.params[index] assignment")
-            
-            new_value = float(param)
-            logger.info(f"Got new value: {new_value}")
-            
-            logger.info(f"Set {fx.name} param {param_index} ({param.name}) from {old_value:.3f} to {new_value:.3f}")
+                logger.info(f"Converted formatted value {value} to parameter value {actual_value_to_set}")
+            logger.info(f"Set {fx_name} param {param_index} ({param_name}) from {old_value:.3f} to {new_value:.3f}")
             
             # Show both formatted and actual values in response
-            try:
-                new_formatted = param.formatted
-                if use_formatted:
-                    return f"Successfully set parameter '{param.name}' on '{fx.name}' to {new_formatted} (target: {value}, actual param: {new_value:.3f})"
-                else:
-                    return f"Successfully set parameter '{param.name}' on '{fx.name}' to {new_value:.3f} (formatted: {new_formatted})"
-            except:
-                return f"Successfully set parameter '{param.name}' on '{fx.name}' to {new_value:.3f}"
+            if new_formatted is None:
+                return f"Successfully set parameter '{param_name}' on '{fx_name}' to {new_value:.3f}"
+            if use_formatted:
+                return f"Successfully set parameter '{param_name}' on '{fx_name}' to {new_formatted} (target: {value}, actual param: {new_value:.3f})"
+            return f"Successfully set parameter '{param_name}' on '{fx_name}' to {new_value:.3f} (formatted: {new_formatted})"
             
         except Exception as e:
             logger.error(f"Error in set_fx_parameter: {e}")
@@ -610,7 +695,7 @@ class ReaperController:
     
     def modify_fx_parameter(self, track_identifier: str, fx_index: int, param_index: int, operation: str, value: float) -> str:
         """Modify an FX parameter by multiplying current value or setting absolute value"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -619,49 +704,44 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
-            # Check if FX index is valid
-            if fx_index < 0 or fx_index >= len(track.fxs):
-                return f"FX index {fx_index} is out of range (0-{len(track.fxs)-1})"
-            
-            fx = track.fxs[fx_index]
-            logger.info(f"Modify FX: {fx.name}, type: {type(fx)}")
-            
-            # Check if parameter index is valid
-            if param_index < 0 or param_index >= len(fx.params):
-                return f"Parameter index {param_index} is out of range (0-{len(fx.params)-1})"
-            
-            param = fx.params[param_index]
-            logger.info(f"Modify param: {param.name}, type: {type(param)}")
-            
-            current_value = float(param)
-            logger.info(f"Current value: {current_value}")
+            if operation not in ("multiply", "set"):
+                return f"Invalid operation '{operation}'. Use 'multiply' or 'set'"
             
-            if operation == "multiply":
-                # Multiply current value by the factor
-                new_value = current_value * value
-                logger.info(f"Calculated new value: {new_value}")
+            # Do the whole read/modify/write in one batch and keep what we need in locals
+            with self._reapy.inside_reaper():
+                fx_count = len(track.fxs)
                 
-                # Set parameter directly using fx.params[index] = value
-                fx.params[param_index] = new_value
-                logger.info("Successfully set parameter using fx.params[index] assignment")
+                # Check if FX index is valid
+                if fx_index < 0 or fx_index >= fx_count:
+                    return f"FX index {fx_index} is out of range (0-{fx_count-1})"
                 
-                actual_new_value = float(param)
+                fx = track.fxs[fx_index]
+                fx_name = fx.name
+                param_count = len(fx.params)
                 
-                logger.info(f"Multiplied {fx.name} param {param_index} ({param.name}) by {value:.3f}: {current_value:.3f} -> {actual_new_value:.3f}")
-                return f"Successfully multiplied parameter '{param.name}' on '{fx.name}' by {value:.3f} (new value: {actual_new_value:.3f})"
+                # Check if parameter index is valid
+                if param_index < 0 or param_index >= param_count:
+                    return f"Parameter index {param_index} is out of range (0-{param_count-1})"
                 
-            elif operation == "set":
-                # Set parameter directly using fx.params[index] = value
-                fx.params[param_index] = value
-                logger.info("Successfully set parameter using fx.params[index] assignment")
+                param = fx.params[param_index]
+                param_name = param.name
+                current_value = float(param)
                 
-                actual_new_value = float(param)
-                 
-                logger.info(f"Set {fx.name} param {param_index} ({param.name}) from {current_value:.3f} to {actual_new_value:.3f}")
-                return f"Successfully set parameter '{param.name}' on '{fx.name}' to {value:.3f}"
+                # Multiply current value by the factor, or set it outright
+                new_value = current_value * value if operation == "multiply" else value
                 
-            else:
-                return f"Invalid operation '{operation}'. Use 'multiply' or 'set'"
+                # Set parameter directly using fx.params[index] = value
+                fx.params[param_index] = new_value
+                
+                # Param objects hold the value they were read with, so read it back fresh
+                actual_new_value = float(fx.params[param_index])
+            
+            if operation == "multiply":
+                logger.info(f"Multiplied {fx_name} param {param_index} ({param_name}) by {value:.3f}: {current_value:.3f} -> {actual_new_value:.3f}")
+                return f"Successfully multiplied parameter '{param_name}' on '{fx_name}' by {value:.3f} (new value: {actual_new_value:.3f})"
+            
+            logger.info(f"Set {fx_name} param {param_index} ({param_name}) from {current_value:.3f} to {actual_new_value:.3f}")
+            return f"Successfully set parameter '{param_name}' on '{fx_name}' to {value:.3f}"
             
         except Exception as e:
             logger.error(f"Error in modify_fx_parameter: {e}")
@@ -670,7 +750,7 @@ class ReaperController:
     
     def add_midi_item(self, track_identifier: str, start_time: float = 0, end_time: float = 4) -> str:
         """Add a MIDI item to a track"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -679,10 +759,11 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
+            track_name = track.name
             # Add MIDI item
             midi_item = track.add_midi_item(start=start_time, end=end_time)
-            logger.info(f"Added MIDI item to track '{track.name}' from {start_time}s to {end_time}s")
-            return f"Successfully added MIDI item to track '{track.name}' from {start_time}s to {end_time}s"
+            logger.info(f"Added MIDI item to track '{track_name}' from {start_time}s to {end_time}s")
+            return f"Successfully added MIDI item to track '{track_name}' from {start_time}s to {end_time}s"
             
         except Exception as e:
             return f"Error adding MIDI item: {str(e)}"
@@ -690,7 +771,7 @@ class ReaperController:
     def add_note_to_track(self, track_identifier: str, start_time: float, end_time: float, 
                          pitch: int, velocity: int = 100, channel: int = 0) -> str:
         """Add a MIDI note to the active MIDI item on a track"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -699,25 +780,26 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
+            track_name = track.name
             # Find MIDI items on track
-            midi_items = [item for item in track.items if item.active_take and item.active_take.is_midi]
+            midi_items = self._get_midi_items(track)
             if not midi_items:
-                return f"No MIDI items found on track '{track.name}'. Create a MIDI item first."
+                return f"No MIDI items found on track '{track_name}'. Create a MIDI item first."
             
             # Use the first MIDI item (or you could specify which one)
             midi_item = midi_items[0]
             take = midi_item.active_take
             
             # Validate pitch range
-            if not (0 <= pitch <= 127):
+            if pitch not in MIDI_VALUE_RANGE:
                 return f"Invalid pitch {pitch}. Must be between 0 and 127."
             
             # Validate velocity range
-            if not (0 <= velocity <= 127):
+            if velocity not in MIDI_VALUE_RANGE:
                 return f"Invalid velocity {velocity}. Must be between 0 and 127."
             
             # Validate channel range
-            if not (0 <= channel <= 15):
+            if channel not in MIDI_CHANNEL_RANGE:
                 return f"Invalid channel {channel}. Must be between 0 and 15."
             
             # Add note
@@ -730,19 +812,17 @@ class ReaperController:
             )
             
             # Convert pitch to note name for display
-            note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-            octave = (pitch // 12) - 1
-            note_name = note_names[pitch % 12] + str(octave)
+            note_name = _PITCH_NAMES[pitch]
             
-            logger.info(f"Added note {note_name} (pitch {pitch}) to track '{track.name}'")
-            return f"Successfully added note {note_name} (pitch {pitch}) to track '{track.name}' from {start_time}s to {end_time}s"
+            logger.info(f"Added note {note_name} (pitch {pitch}) to track '{track_name}'")
+            return f"Successfully added note {note_name} (pitch {pitch}) to track '{track_name}' from {start_time}s to {end_time}s"
             
         except Exception as e:
             return f"Error adding note: {str(e)}"
     
     def list_notes_on_track(self, track_identifier: str, item_index: int = 0) -> str:
         """List all MIDI notes on a track"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -751,10 +831,11 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
+            track_name = track.name
             # Find MIDI items on track
-            midi_items = [item for item in track.items if item.active_take and item.active_take.is_midi]
+            midi_items = self._get_midi_items(track)
             if not midi_items:
-                return f"No MIDI items found on track '{track.name}'"
+                return f"No MIDI items found on track '{track_name}'"
             
             if item_index >= len(midi_items):
                 return f"MIDI item index {item_index} out of range. Track has {len(midi_items)} MIDI items."
@@ -762,32 +843,26 @@ class ReaperController:
             midi_item = midi_items[item_index]
             take = midi_item.active_take
             
-            if not take.notes:
-                return f"No notes found in MIDI item {item_index} on track '{track.name}'"
+            # One infos read per note, all in a single batch, instead of five property reads each
+            with self._reapy.inside_reaper():
+                note_infos = [note.infos for note in take.notes]
             
-            # Convert pitch to note name helper
-            def pitch_to_note_name(pitch):
-                note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-                octave = (pitch // 12) - 1
-                return note_names[pitch % 12] + str(octave)
+            if not note_infos:
+                return f"No notes found in MIDI item {item_index} on track '{track_name}'"
             
             # List all notes
-            note_list = []
-            for i, note in enumerate(take.notes):
-                note_name = pitch_to_note_name(note.pitch)
-                note_info = f"{i}: {note_name} (pitch {note.pitch}) - {note.start:.2f}s to {note.end:.2f}s, vel {note.velocity}, ch {note.channel}"
-                note_list.append(note_info)
-            
-            result = f"Notes in MIDI item {item_index} on track '{track.name}':\n"
-            result += "\n".join(note_list)
-            return result
+            note_list = "\n".join(
+                f"{i}: {_PITCH_NAMES[info['pitch']]} (pitch {info['pitch']}) - {info['start']:.2f}s to {info['end']:.2f}s, vel {info['velocity']}, ch {info['channel']}"
+                for i, info in enumerate(note_infos)
+            )
+            return f"Notes in MIDI item {item_index} on track '{track_name}':\n{note_list}"
             
         except Exception as e:
             return f"Error listing notes: {str(e)}"
     
     def transpose_notes(self, track_identifier: str, semitones: int, item_index: int = -1) -> str:
         """Transpose all notes on a track by specified semitones"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -796,10 +871,11 @@ class ReaperController:
             if not track:
                 return f"Track '{track_identifier}' not found"
             
+            track_name = track.name
             # Find MIDI items on track
-            midi_items = [item for item in track.items if item.active_take and item.active_take.is_midi]
+            midi_items = self._get_midi_items(track)
             if not midi_items:
-                return f"No MIDI items found on track '{track.name}'"
+                return f"No MIDI items found on track '{track_name}'"
             
             # Determine which items to transpose
             items_to_process = []
@@ -814,81 +890,46 @@ class ReaperController:
             
             total_notes_transposed = 0
             
-            for midi_item in items_to_process:
-                take = midi_item.active_take
-                
-                # Collect all note data before deleting
-                notes_data = []
-                for note in take.notes:
-                    # Get note information using the infos property for efficiency
-                    note_info = note.infos
-                    notes_data.append({
-                        'start': note_info['start'],
-                        'end': note_info['end'],
-                        'pitch': note_info['pitch'],
-                        'velocity': note_info['velocity'],
-                        'channel': note_info['channel'],
-                        'selected': note_info['selected'],
-                        'muted': note_info['muted']
-                    })
-                
-                # Clear all existing notes
-                # We need to delete notes in reverse order to avoid index shifting issues
-                for i in range(len(take.notes) - 1, -1, -1):
-                    take.notes[i].delete()
-                
-                # Add new notes with transposed pitch
-                for note_data in notes_data:
-                    new_pitch = note_data['pitch'] + semitones
+            # Change each pitch in place inside one inside_reaper() block; start, end,
+            # velocity, channel and selection are written back unchanged
+            RPR = self._rpr
+            with self._reapy.inside_reaper():
+                for midi_item in items_to_process:
+                    take_id = midi_item.active_take.id
+                    note_count = midi_item.active_take.n_notes
                     
-                    # Clamp to valid MIDI range (0-127)
-                    if new_pitch < 0:
-                        new_pitch = 0
-                    elif new_pitch > 127:
-                        new_pitch = 127
+                    for i in range(note_count):
+                        _, _, _, selected, muted, start_ppq, end_ppq, channel, pitch, velocity = RPR.MIDI_GetNote(take_id, i)
+                        
+                        # Clamp to valid MIDI range (0-127)
+                        new_pitch = min(127, max(0, pitch + semitones))
+                        
+                        # noSort=True: sort once per take below instead of after each note
+                        RPR.MIDI_SetNote(take_id, i, selected, muted, start_ppq, end_ppq, channel, new_pitch, velocity, True)
                     
-                    # Add the transposed note
-                    take.add_note(
-                        start=note_data['start'],
-                        end=note_data['end'],
-                        pitch=new_pitch,
-                        velocity=note_data['velocity'],
-                        channel=note_data['channel'],
-                        selected=note_data['selected'],
-                        muted=note_data['muted'],
-                        sort=False  # Don't sort after each note for efficiency
-                    )
-                    total_notes_transposed += 1
-                
-                # Sort all notes at the end for efficiency
-                if notes_data:
-                    take.sort_events()
+                    if note_count:
+                        RPR.MIDI_Sort(take_id)
+                    total_notes_transposed += note_count
             
             # Describe the transposition
-            if semitones > 0:
-                direction = f"up {semitones} semitones"
-                if semitones == 12:
-                    direction = "up one octave"
-                elif semitones % 12 == 0:
-                    direction = f"up {semitones // 12} octaves"
-            elif semitones < 0:
-                direction = f"down {abs(semitones)} semitones"
-                if semitones == -12:
-                    direction = "down one octave"
-                elif semitones % 12 == 0:
-                    direction = f"down {abs(semitones) // 12} octaves"
-            else:
-                direction = "by 0 semitones (no change)"
+            direction = _OCTAVE_DESCRIPTIONS.get(semitones)
+            if direction is None:
+                if semitones > 0:
+                    direction = f"up {semitones} semitones"
+                elif semitones < 0:
+                    direction = f"down {abs(semitones)} semitones"
+                else:
+                    direction = "by 0 semitones (no change)"
             
-            logger.info(f"Transposed {total_notes_transposed} notes {direction} on track '{track.name}'")
-            return f"Successfully transposed {total_notes_transposed} notes {direction} in {item_desc} on track '{track.name}'"
+            logger.info(f"Transposed {total_notes_transposed} notes {direction} on track '{track_name}'")
+            return f"Successfully transposed {total_notes_transposed} notes {direction} in {item_desc} on track '{track_name}'"
             
         except Exception as e:
             return f"Error transposing notes: {str(e)}"
     
     def add_multiple_notes(self, track_identifier: str, note_data: str) -> str:
         """Add multiple MIDI notes to a track at once using string format"""
-        if not project:
+        if not self.project:
             return "Error: Not connected to REAPER"
         
         try:
@@ -902,32 +943,17 @@ class ReaperController:
             if not note_data or not note_data.strip():
                 return "Error: note_data is empty"
             
-            # Find track
-            track = self._find_track(track_identifier)
-            if not track:
-                return f"Track '{track_identifier}' not found"
-            
-            # Find MIDI items on track
-            midi_items = [item for item in track.items if item.active_take and item.active_take.is_midi]
-            if not midi_items:
-                return f"No MIDI items found on track '{track.name}'. Create a MIDI item first."
-            
-            # Use the first MIDI item
-            midi_item = midi_items[0]
-            take = midi_item.active_take
-            
-            # Parse notes from string
-            note_strings = note_data.split('|')
-            added_notes = []
-            
-            for i, note_str in enumerate(note_strings):
+            # Parse and validate every note before touching REAPER, so bad input
+            # fails without leaving a partial set of notes behind
+            notes = []
+            for i, raw_note in enumerate(note_data.split('|')):
+                if not (note_str := raw_note.strip()):
+                    continue
+                
                 try:
-                    note_str = note_str.strip()
-                    if not note_str:
-                        continue
-                        
-                    # Split by comma: pitch,start,end,velocity (velocity optional)
-                    parts = note_str.split(',')
+                    # Split by comma: pitch,start,end,velocity (velocity optional); anything
+                    # past the fourth field is ignored, so stop splitting there
+                    parts = note_str.split(',', 4)
                     
                     if len(parts) < 3:
                         return f"Invalid note format in note {i}: '{note_str}'. Expected format: 'pitch,start,end' or 'pitch,start,end,velocity'"
@@ -937,46 +963,57 @@ class ReaperController:
                     start_time = float(parts[1])
                     end_time = float(parts[2])
                     velocity = int(parts[3]) if len(parts) > 3 else 100
-                    channel = 0  # Default channel
-                    
-                    # Validate ranges
-                    if not (0 <= pitch <= 127):
-                        return f"Invalid pitch {pitch} in note {i}. Must be between 0 and 127."
-                    if not (0 <= velocity <= 127):
-                        return f"Invalid velocity {velocity} in note {i}. Must be between 0 and 127."
-                    if end_time <= start_time:
-                        return f"Invalid timing in note {i}: end_time ({end_time}) must be greater than start_time ({start_time})."
                     
+                except ValueError as e:
+                    return f"Invalid number format in note {i}: '{note_str}'. Error: {e}"
+                
+                # Validate ranges
+                if pitch not in MIDI_VALUE_RANGE:
+                    return f"Invalid pitch {pitch} in note {i}. Must be between 0 and 127."
+                if velocity not in MIDI_VALUE_RANGE:
+                    return f"Invalid velocity {velocity} in note {i}. Must be between 0 and 127."
+                if end_time <= start_time:
+                    return f"Invalid timing in note {i}: end_time ({end_time}) must be greater than start_time ({start_time})."
+                
+                notes.append((pitch, start_time, end_time, velocity))
+            
+            if not notes:
+                return "No valid notes were parsed from the note_data"
+            
+            # Find track
+            track = self._find_track(track_identifier)
+            if not track:
+                return f"Track '{track_identifier}' not found"
+            
+            # inside_reaper() has REAPER service the inserts back to back (each
+            # add_note is still its own request); events are sorted once at the end
+            with self._reapy.inside_reaper():
+                # Find MIDI items on track
+                midi_items = self._get_midi_items(track)
+                if not midi_items:
+                    return f"No MIDI items found on track '{track.name}'. Create a MIDI item first."
+                
+                # Use the first MIDI item
+                take = midi_items[0].active_take
+                
+                for pitch, start_time, end_time, velocity in notes:
                     # Add note (with sort=False for efficiency)
                     take.add_note(
                         start=start_time,
                         end=end_time,
                         pitch=pitch,
                         velocity=velocity,
-                        channel=channel,
+                        channel=0,  # Default channel
                         sort=False
                     )
-                    
-                    # Convert pitch to note name for logging
-                    note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-                    octave = (pitch // 12) - 1
-                    note_name = note_names[pitch % 12] + str(octave)
-                    
-                    added_notes.append(f"{note_name} ({pitch})")
-                    
-                except ValueError as e:
-                    return f"Invalid number format in note {i}: '{note_str}'. Error: {e}"
-                except Exception as e:
-                    return f"Error processing note {i}: '{note_str}'. Error: {e}"
-            
-            if not added_notes:
-                return "No valid notes were parsed from the note_data"
-            
-            # Sort all notes at the end for efficiency
-            take.sort_events()
+                
+                # Sort all notes at the end for efficiency
+                take.sort_events()
+                track_name = track.name
             
-            logger.info(f"Added {len(added_notes)} notes to track '{track.name}'")
-            return f"Successfully added {len(added_notes)} notes to track '{track.name}': {', '.join(added_notes)}"
+            added_notes = ", ".join(f"{_PITCH_NAMES[pitch]} ({pitch})" for pitch, _, _, _ in notes)
+            logger.info(f"Added {len(notes)} notes to track '{track_name}'")
+            return f"Successfully added {len(notes)} notes to track '{track_name}': {added_notes}"
             
         except Exception as e:
             return f"Error adding multiple notes: {str(e)}"
@@ -1012,158 +1049,187 @@ class ReaperController:
             return target_formatted_value / 1000.0  # Common case: ms to 0-1 range
     
     def _find_param_value_by_testing(self, param, target_formatted_value: float) -> float:
-        """Find parameter value by testing different values to match formatted output"""
+        """Find parameter value by sampling the formatted output across the range and interpolating"""
         try:
-            original_value = float(param)
+            # A parameter sampled before converts without probing REAPER again
+            calibration_key = self._param_calibration_key(param)
+            samples = self._param_calibration.get(calibration_key)
+            if samples:
+                return _interpolate_param_value(samples, target_formatted_value)
             
-            # Test a few values to understand the relationship
-            test_values = [0.1, 0.2, 0.5, 0.8]
-            best_match = 0.1
-            best_diff = float('inf')
+            param_list = param.parent_fx.params
+            original_value = float(param)
             
-            for test_val in test_values:
-                # Temporarily set the parameter
-                param.parent_fx.params[param.index] = test_val
-                test_formatted = float(param.formatted)
-                
-                # Calculate how close this is to our target
-                diff = abs(test_formatted - target_formatted_value)
-                if diff < best_diff:
-                    best_diff = diff
-                    best_match = test_val
+            # Sample the formatted value at a few points; three samples keep the
+            # error low for curved (e.g. logarithmic) parameters
+            samples = []
+            for test_val in _CALIBRATION_POINTS:
+                param_list[param.index] = test_val
+                samples.append((test_val, float(param.formatted)))
             
             # Restore original value
-            param.parent_fx.params[param.index] = original_value
-            
-            # Use linear interpolation to get closer
-            if best_diff > 0:
-                # Try to interpolate for better accuracy
-                param.parent_fx.params[param.index] = best_match
-                current_formatted = float(param.formatted)
-                if current_formatted != 0:
-                    refined_value = best_match * (target_formatted_value / current_formatted)
-                    refined_value = max(0.0, min(1.0, refined_value))
-                    param.parent_fx.params[param.index] = original_value  # Restore
-                    return refined_value
-            
-            param.parent_fx.params[param.index] = original_value  # Restore
-            return best_match
+            param_list[param.index] = original_value
+            
+            # Remember the samples so later conversions for this parameter skip the probing;
+            # without a key the parameter can't be told apart from others, so don't cache
+            if calibration_key is not None:
+                self._param_calibration[calibration_key] = samples
+            
+            return _interpolate_param_value(samples, target_formatted_value)
             
         except Exception as e:
             logger.error(f"Error in testing method: {e}")
             return target_formatted_value / 1000.0  # Fallback
     
+    def _param_calibration_key(self, param):
+        """Identify a parameter by track, FX slot, FX name and parameter index"""
+        fx = _read_attr(param, 'parent_fx')
+        if fx is None:
+            return None
+        # The FX name guards against a different plugin ending up in the same slot
+        return (fx.parent_id, fx.index, fx.name, param.index)
+    
+    def _get_midi_items(self, track):
+        """Return the items on a track whose active take is MIDI"""
+        # Read each active take once instead of once for the check and again for is_midi
+        return [item for item in track.items if (take := item.active_take) and take.is_midi]
+    
+    def _get_track_context(self):
+        """Return the list_tracks text, reusing the last one while the project is unchanged"""
+        if not self.project:
+            return self.list_tracks()
+        
+        # REAPER bumps this counter on every undoable change, including edits made by hand;
+        # tool calls that change the project also reset the cached text
+        try:
+            change_count = self._rpr.GetProjectStateChangeCount(self.project.id)
+        except Exception as e:
+            logger.warning(f"Could not read project change count: {e}")
+            return self.list_tracks()
+        
+        if self._track_context and self._track_context[0] == change_count:
+            return self._track_context[1]
+        
+        track_context = self.list_tracks()
+        if not track_context.startswith("Error"):
+            self._track_context = (change_count, track_context)
+        return track_context
+    
+    def _refresh_track_cache(self):
+        """Fetch all tracks and their names from REAPER in one batch"""
+        with self._reapy.inside_reaper():
+            tracks = list(self.project.tracks)
+            names = [track.name for track in tracks]
+        
+        self._tracks = tracks
+        self._tracks_by_name = {}
+        for name, track in zip(names, tracks):
+            # Keep the first track for duplicate names, like a linear scan would
+            self._tracks_by_name.setdefault(name, track)
+    
+    def _invalidate_track_cache(self):
+        """Drop cached tracks after the track list changes"""
+        self._tracks = None
+        self._tracks_by_name = {}
+    
     def _find_track(self, track_identifier: str):
         """Helper method to find track by name or index"""
-        # Search by name first
-        for track in project.tracks:
-            if track.name == track_identifier:
-                return track
+        # Parse the identifier once; only plain digit strings can be an index
+        identifier = str(track_identifier).strip()
+        track_index = int(identifier) if identifier.isdecimal() else None
         
-        # Try by index
-        try:
-            track_index = int(track_identifier)
-            if 0 <= track_index < len(project.tracks):
-                return project.tracks[track_index]
-        except ValueError:
-            pass
+        refreshed = self._tracks is None
+        if refreshed:
+            self._refresh_track_cache()
         
-        return None
+        track = self._lookup_track(track_identifier, track_index)
+        if track is None and not refreshed:
+            # The track may have been added or renamed in REAPER since the cache was built
+            self._refresh_track_cache()
+            track = self._lookup_track(track_identifier, track_index)
+        
+        return track
+    
+    def _lookup_track(self, track_identifier: str, track_index):
+        """Resolve a track from the cache, by name first and then by index"""
+        track = self._tracks_by_name.get(track_identifier)
+        if track is None and track_index is not None and 0 <= track_index < len(self._tracks):
+            track = self._tracks[track_index]
+        return track
     
     def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """Execute a tool function"""
         try:
             logger.info(f"Executing tool '{tool_name}' with arguments: {arguments}")
             
-            if tool_name == "add_track":
-                return self.add_track(arguments["track_name"])
-            elif tool_name == "delete_track":
-                return self.delete_track(arguments["track_identifier"])
-            elif tool_name == "add_fx_to_track":
-                return self.add_fx_to_track(arguments["track_identifier"], arguments["fx_name"])
-            elif tool_name == "remove_fx_from_track":
-                return self.remove_fx_from_track(arguments["track_identifier"], arguments["fx_index"])
-            elif tool_name == "list_tracks":
-                return self.list_tracks()
-            elif tool_name == "list_fx_on_track":
-                return self.list_fx_on_track(arguments["track_identifier"])
-            elif tool_name == "inspect_fx_parameters":
-                return self.inspect_fx_parameters(arguments["track_identifier"], arguments["fx_index"])
-            elif tool_name == "set_fx_parameter":
-                return self.set_fx_parameter(
-                    arguments["track_identifier"], 
-                    arguments["fx_index"], 
-                    arguments["param_index"], 
-                    arguments["value"],
-                    arguments.get("use_formatted", True)
-                )
-            elif tool_name == "modify_fx_parameter":
-                return self.modify_fx_parameter(
-                    arguments["track_identifier"], 
-                    arguments["fx_index"], 
-                    arguments["param_index"], 
-                    arguments["operation"],
-                    arguments["value"]
-                )
-            elif tool_name == "add_midi_item":
-                return self.add_midi_item(
-                    arguments["track_identifier"],
-                    arguments.get("start_time", 0),
-                    arguments.get("end_time", 4)
-                )
-            elif tool_name == "add_note_to_track":
-                return self.add_note_to_track(
-                    arguments["track_identifier"],
-                    arguments["start_time"],
-                    arguments["end_time"],
-                    arguments["pitch"],
-                    arguments.get("velocity", 100),
-                    arguments.get("channel", 0)
-                )
-            elif tool_name == "list_notes_on_track":
-                return self.list_notes_on_track(
-                    arguments["track_identifier"],
-                    arguments.get("item_index", 0)
-                )
-            elif tool_name == "transpose_notes":
-                return self.transpose_notes(
-                    arguments["track_identifier"],
-                    arguments["semitones"],
-                    arguments.get("item_index", -1)
-                )
-            elif tool_name == "add_multiple_notes":
-                # Debug logging to see what arguments we received
-                logger.info(f"add_multiple_notes called with arguments: {arguments}")
-                
-                # Check if required parameters exist
-                if "track_identifier" not in arguments:
-                    return "Error: Missing required parameter 'track_identifier'"
-                if "note_data" not in arguments:
-                    return f"Error: Missing required parameter 'note_data'. Received arguments: {list(arguments.keys())}"
-                
-                return self.add_multiple_notes(
-                    arguments["track_identifier"],
-                    arguments["note_data"]
-                )
-            else:
+            handler = self._dispatch.get(tool_name)
+            if handler is None:
                 return f"Unknown tool: {tool_name}"
+            
+            # Check required parameters up front and drop anything the handler doesn't accept
+            missing = self._required_args[tool_name].difference(arguments)
+            if missing:
+                missing_names = ", ".join(f"'{name}'" for name in sorted(missing))
+                return f"Error: Missing required parameter {missing_names} for tool {tool_name}. Received arguments: {list(arguments.keys())}"
+            
+            # Type and enum checks, when fastjsonschema is installed
+            validator = self._validators.get(tool_name)
+            if validator:
+                try:
+                    # Validate a copy: the validator fills in schema defaults, and
+                    # arguments is the tool_use input kept in the message history
+                    arguments = validator(dict(arguments))
+                except fastjsonschema.JsonSchemaException as e:
+                    return f"Error: Invalid arguments for tool {tool_name}: {e.message}"
+            
+            known_args = self._tool_args[tool_name]
+            kwargs = {name: value for name, value in arguments.items() if name in known_args}
+            
+            if tool_name not in READ_ONLY_TOOLS:
+                # Anything cached may be stale once a tool changes the project
+                self._read_cache.clear()
+                self._track_context = None
+                return handler(**kwargs)
+            
+            # Repeated identical reads within a query are answered from the cache
+            cache_key = (tool_name, tuple(sorted(kwargs.items())))
+            if cache_key in self._read_cache:
+                logger.info(f"Using cached result for '{tool_name}'")
+                return self._read_cache[cache_key]
+            
+            result = handler(**kwargs)
+            if not result.startswith("Error"):
+                self._read_cache[cache_key] = result
+            return result
                 
-        except KeyError as e:
-            logger.error(f"KeyError in execute_tool: {e}")
-            logger.error(f"Tool: {tool_name}, Arguments: {arguments}")
-            return f"Error: Missing required parameter {e} for tool {tool_name}"
         except Exception as e:
             logger.error(f"Error executing tool {tool_name}: {e}")
             return f"Error executing tool {tool_name}: {str(e)}"
     
+    def _compact_tool_results(self, messages: List[Dict[str, Any]]):
+        """Truncate long tool results from older rounds so each round resends less history"""
+        tool_result_turns = [
+            message for message in messages
+            if message["role"] == "user" and isinstance(message["content"], list)
+        ]
+        for message in tool_result_turns[:-FULL_RESULT_ROUNDS]:
+            for block in message["content"]:
+                content = block["content"]
+                if len(content) > COMPACT_RESULT_CHARS:
+                    block["content"] = content[:COMPACT_RESULT_CHARS] + "... (truncated)"
+    
     def process_query_with_chaining(self, user_query: str, max_rounds: int = 10) -> str:
         """Process user query with multi-round tool calling support"""
         if not self.client:
             return "Error: Claude API not configured"
         
         try:
+            # The project may have been edited in REAPER since the last query
+            self._read_cache.clear()
+            self._invalidate_track_cache()
+            
             # Always get current track context first
-            track_context = self.list_tracks()
+            track_context = self._get_track_context()
             
             # Provide context to Claude upfront
             context_message = f"Current REAPER project state:\n{track_context}\n\nUser request: {user_query}"
@@ -1182,20 +1248,32 @@ class ReaperController:
                 round_count += 1
                 logger.info(f"Tool calling round {round_count}")
                 
-                # Get response from Claude
-                response = self.client.messages.create(
-                    model="claude-sonnet-4-20250514",
+                # Stream the response from Claude and run each tool as soon as its block
+                # is complete, while the rest of the turn is still being generated
+                tool_outputs = {}
+                with self.client.messages.stream(
+                    model=CLAUDE_MODEL,
                     max_tokens=1000,
                     tools=self.tools,
                     messages=messages
-                )
+                ) as stream:
+                    for event in stream:
+                        if event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                            block = event.content_block
+                            tool_outputs[block.id] = self.execute_tool(block.name, block.input)
+                    response = stream.get_final_message()
                 
                 # Add Claude's response to messages
                 messages.append({"role": "assistant", "content": response.content})
                 
                 # Check if Claude wants to use tools
-                tool_calls = [content for content in response.content if content.type == "tool_use"]
-                text_content = [content for content in response.content if content.type == "text"]
+                tool_calls = []
+                text_content = []
+                for content in response.content:
+                    if content.type == "tool_use":
+                        tool_calls.append(content)
+                    elif content.type == "text":
+                        text_content.append(content)
                 
                 logger.info(f"Round {round_count}: Found {len(tool_calls)} tool calls, {len(text_content)} text responses")
                 
@@ -1223,8 +1301,10 @@ class ReaperController:
                     tool_args = tool_call.input
                     tool_id = tool_call.id
                     
-                    # Execute the tool
-                    result = self.execute_tool(tool_name, tool_args)
+                    # Already executed while streaming; fall back in case the block was missed
+                    result = tool_outputs.get(tool_id)
+                    if result is None:
+                        result = self.execute_tool(tool_name, tool_args)
                     results.append(f"Round {round_count} - {tool_name}: {result}")
                     
                     tool_results.append({
@@ -1238,6 +1318,12 @@ class ReaperController:
                     "role": "user",
                     "content": tool_results
                 })
+                self._compact_tool_results(messages)
+                
+                # Resend only the original request and the most recent rounds. Rounds are dropped
+                # as whole (assistant, tool result) pairs so every tool_use keeps its result.
+                if len(messages) > 1 + 2 * MAX_HISTORY_ROUNDS:
+                    messages[1:-2 * MAX_HISTORY_ROUNDS] = []
             
             if round_count >= max_rounds:
                 results.append(f"Reached maximum rounds ({max_rounds}). Stopping here.")
@@ -1248,6 +1334,72 @@ class ReaperController:
             logger.error(f"Error in chained processing: {e}")
             return f"Error in chained processing: {str(e)}"
 
+    def run_batch(self, queries: List[str], max_wait: float = 3600) -> List[str]:
+        """Run independent single-round queries through the Message Batches API.
+
+        Meant for scripted, non-urgent jobs: every query is sent with the same
+        project context, and any tool calls in the replies are executed once the
+        batch has finished. Results are returned in the order of ``queries``.
+        """
+        if not self.client:
+            return ["Error: Claude API not configured"] * len(queries)
+        
+        self._read_cache.clear()
+        self._invalidate_track_cache()
+        track_context = self._get_track_context()
+        requests = [
+            {
+                "custom_id": f"query-{i}",
+                "params": {
+                    "model": CLAUDE_MODEL,
+                    "max_tokens": 1000,
+                    "tools": self.tools,
+                    "messages": [{
+                        "role": "user",
+                        "content": f"Current REAPER project state:\n{track_context}\n\nUser request: {query}"
+                    }]
+                }
+            }
+            for i, query in enumerate(queries)
+        ]
+        
+        try:
+            batch = self.client.messages.batches.create(requests=requests)
+            logger.info(f"Submitted batch {batch.id} with {len(requests)} queries")
+            
+            # Poll with exponential backoff; batches usually take minutes, not seconds
+            delay = 5.0
+            deadline = time.monotonic() + max_wait
+            while batch.processing_status != "ended":
+                if time.monotonic() >= deadline:
+                    return [f"Error: batch {batch.id} did not finish within {max_wait}s"] * len(queries)
+                time.sleep(delay)
+                delay = min(delay * 2, 60.0)
+                batch = self.client.messages.batches.retrieve(batch.id)
+            
+            outputs = {}
+            for entry in self.client.messages.batches.results(batch.id):
+                if entry.result.type != "succeeded":
+                    outputs[entry.custom_id] = f"Error: batch request {entry.result.type}"
+                    continue
+                
+                lines = []
+                for content in entry.result.message.content:
+                    if content.type == "text":
+                        lines.append(content.text)
+                    elif content.type == "tool_use":
+                        result = self.execute_tool(content.name, content.input)
+                        lines.append(f"{content.name}: {result}")
+                outputs[entry.custom_id] = "\n".join(lines)
+            
+            return [outputs.get(f"query-{i}", "Error: no result returned") for i in range(len(queries))]
+            
+        except Exception as e:
+            logger.error(f"Error in batch processing: {e}")
+            return [f"Error in batch processing: {str(e)}"] * len(queries)
+
+QUIT_COMMANDS = frozenset({'quit', 'exit', 'q'})
+
 def main():
     """Main function for testing"""
     controller = ReaperController()
@@ -1271,7 +1423,7 @@ def main():
     while True:
         try:
             user_input = input("Enter command: ").strip()
-            if user_input.lower() in ['quit', 'exit', 'q']:
+            if user_input.lower() in QUIT_COMMANDS:
                 break
             
             if user_input:
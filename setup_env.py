@@ -10,11 +10,6 @@ def create_env_file():
     backend_dir = os.path.join(os.path.dirname(__file__), 'backend')
     env_path = os.path.join(backend_dir, '.env')
     
-    # Check if .env already exists
-    if os.path.exists(env_path):
-        print(f".env file already exists at: {env_path}")
-        return
-    
     # Create .env content
     env_content = """# OpenAI API Key
 OPENAI_API_KEY=your_openai_api_key_here
@@ -23,9 +18,13 @@ OPENAI_API_KEY=your_openai_api_key_here
 BEATOVEN_AI_API_KEY=your_beatoven_ai_api_key_here
 """
     
-    # Write .env file
-    with open(env_path, 'w') as f:
-        f.write(env_content)
+    # Write .env file; 'x' refuses to overwrite an existing one in the same open call
+    try:
+        with open(env_path, 'x') as f:
+            f.write(env_content)
+    except FileExistsError:
+        print(f".env file already exists at: {env_path}")
+        return
     
     print(f"Created .env file at: {env_path}")
     print("Please update your OpenAI API key in the .env file")
@@ -58,26 +58,13 @@ const VoiceButton = ({ onVoiceInput, disabled = false }) => {
 
   const convertAudioToText = async (audioBlob) => {
     try {
-      // Convert blob to base64
-      const reader = new FileReader()
-      const base64Promise = new Promise((resolve) => {
-        reader.onload = () => {
-          const base64Audio = reader.result.split(',')[1] // Remove data URL prefix
-          resolve(base64Audio)
-        }
-      })
-      reader.readAsDataURL(audioBlob)
-      const base64Audio = await base64Promise
-
-      // Send to backend for transcription
+      // Send the raw recording to backend for transcription (no base64 round trip)
       const response = await fetch('http://localhost:5000/transcribe', {
         method: 'POST',
         headers: {
-          'Content-Type': 'application/json',
+          'Content-Type': audioBlob.type || 'audio/webm',
         },
-        body: JSON.stringify({
-          audio: base64Audio
-        })
+        body: audioBlob
       })
 
       const result = await response.json()
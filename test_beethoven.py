@@ -3,14 +3,59 @@
 Test script for Beatoven.ai music generation API
 """
 
-import os
-import requests
+import importlib.util
 import time
 import json
-from dotenv import load_dotenv
+import random
+from functools import lru_cache
+from env_cache import dotenv_present, env, load_env_file
 
-# Load environment variables
-load_dotenv()
+# Beatoven.ai endpoints
+BEATOVEN_API_BASE = "https://public-api.beatoven.ai/api/v1"
+BEATOVEN_COMPOSE_URL = f"{BEATOVEN_API_BASE}/tracks/compose"
+BEATOVEN_TASKS_URL = f"{BEATOVEN_API_BASE}/tasks"
+
+# Optional: faster JSON parsing/printing when orjson is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+@lru_cache(maxsize=1)
+def get_session(api_key):
+    """One keep-alive connection carries the compose request and every status poll"""
+    # requests is imported here so collecting/probing this module stays cheap
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.headers.update({"Authorization": f"Bearer {api_key}"})
+    # Transient 429/5xx replies are retried on the pooled connection (honouring
+    # Retry-After); POST stays out of allowed_methods so a compose is never sent twice
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=frozenset(["GET"])
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
+    return session
+
+def format_json(data):
+    """Pretty-print JSON for the test output"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+def parse_json(response):
+    """Decode a JSON response body"""
+    return orjson.loads(response.content) if orjson else response.json()
+
+def track_url_of(data):
+    """Pull meta.track_url out of a Beatoven task response, if present"""
+    meta = data.get('meta')
+    return meta.get('track_url') if meta else None
 
 def test_beatoven_ai():
     """Test Beatoven.ai API connection and music generation"""
@@ -18,14 +63,20 @@ def test_beatoven_ai():
     print("🎵 Testing Beatoven.ai Music Generation API")
     print("=" * 50)
     
+    import requests
+    
+    # Load environment variables
+    load_env_file()
+    
     # Check API key
-    api_key = os.getenv('BEATOVEN_AI_API_KEY')
+    api_key = env('BEATOVEN_AI_API_KEY')
     if not api_key:
         print("❌ Error: BEATOVEN_AI_API_KEY not found in environment variables")
         print("Please add your Beatoven.ai API key to the .env file")
         return False
     
     print(f"✅ API Key found: {api_key[:10]}...")
+    session = get_session(api_key)
     
     # Test API connection with a simple composition request
     test_prompt = "30 seconds peaceful lo-fi chill hop track"
@@ -43,46 +94,55 @@ def test_beatoven_ai():
     
     try:
         # Send composition request
-        response = requests.post(
-            "https://public-api.beatoven.ai/api/v1/tracks/compose",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json=payload,
+        response = session.post(
+            BEATOVEN_COMPOSE_URL,
+            data=orjson.dumps(payload) if orjson else json.dumps(payload),
+            headers={"Content-Type": "application/json"},
             timeout=30
         )
         
         print(f"Response Status: {response.status_code}")
         
         if response.status_code == 200:
-            response_data = response.json()
+            response_data = parse_json(response)
             print(f"✅ Composition request successful!")
-            print(f"Response: {json.dumps(response_data, indent=2)}")
-            
-            if response_data.get('status') == 'started' and 'task_id' in response_data:
+            print(f"Response: {format_json(response_data)}")
+
+            # Short prompts can come back already composed; no need to poll then
+            compose_status = response_data.get('status')
+            if compose_status == 'composed':
+                print("✅ Track composition completed!")
+                track_url = track_url_of(response_data)
+                if track_url:
+                    print(f"Track URL: {track_url}")
+                return True
+            elif compose_status in ['failed', 'error']:
+                print(f"❌ Composition failed: {response_data}")
+                return False
+
+            if compose_status == 'started' and 'task_id' in response_data:
                 task_id = response_data['task_id']
                 print(f"\n🔄 Task ID: {task_id}")
                 print("Testing status polling...")
                 
-                # Test status polling (just a few attempts)
-                for attempt in range(3):
-                    time.sleep(2)
+                # Test status polling, backing off from 0.25s up to 4s with a little jitter
+                delay = 0.25
+                for attempt in range(6):
+                    time.sleep(delay)
                     
-                    status_response = requests.get(
-                        f"https://public-api.beatoven.ai/api/v1/tasks/{task_id}",
-                        headers={"Authorization": f"Bearer {api_key}"},
+                    status_response = session.get(
+                        f"{BEATOVEN_TASKS_URL}/{task_id}",
                         timeout=10
                     )
                     
                     if status_response.status_code == 200:
-                        status_data = status_response.json()
+                        status_data = parse_json(status_response)
                         status = status_data.get('status')
                         print(f"Status check {attempt + 1}: {status}")
                         
                         if status == 'composed':
                             print("✅ Track composition completed!")
-                            track_url = status_data.get('meta', {}).get('track_url')
+                            track_url = track_url_of(status_data)
                             if track_url:
                                 print(f"Track URL: {track_url}")
                             break
@@ -92,6 +152,8 @@ def test_beatoven_ai():
                     else:
                         print(f"❌ Status check failed: {status_response.status_code}")
                         break
+                    
+                    delay = min(delay * 2, 4.0) + random.uniform(0, 0.1)
                 
                 print("\n✅ Beatoven.ai API is working correctly!")
                 return True
@@ -126,23 +188,15 @@ def test_environment():
     print("🔧 Testing Environment Setup")
     print("=" * 30)
     
-    # Check required packages
-    try:
-        import requests
-        print("✅ requests package available")
-    except ImportError:
-        print("❌ requests package not available")
-        return False
-    
-    try:
-        from dotenv import load_dotenv
-        print("✅ python-dotenv package available")
-    except ImportError:
-        print("❌ python-dotenv package not available")
-        return False
+    # Check required packages (find_spec only locates them, without importing)
+    for module, package in (("requests", "requests"), ("dotenv", "python-dotenv")):
+        if importlib.util.find_spec(module) is None:
+            print(f"❌ {package} package not available")
+            return False
+        print(f"✅ {package} package available")
     
     # Check .env file
-    if os.path.exists('.env'):
+    if dotenv_present('.env'):
         print("✅ .env file found")
     else:
         print("❌ .env file not found")
@@ -3,16 +3,16 @@
 Test script for OpenAI Whisper integration
 """
 
-import os
+import importlib.util
 import sys
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv('backend/.env')
+from env_cache import env, load_env_file
 
 def test_openai_key():
     """Test if OpenAI API key is configured"""
-    api_key = os.getenv('OPENAI_API_KEY')
+    # Load environment variables
+    load_env_file('backend/.env')
+    
+    api_key = env('OPENAI_API_KEY')
     if not api_key:
         print("❌ OPENAI_API_KEY not found in backend/.env")
         print("Please add your OpenAI API key to backend/.env:")
@@ -24,21 +24,16 @@ def test_openai_key():
 
 def test_dependencies():
     """Test if required dependencies are installed"""
-    try:
-        from openai import OpenAI
-        print("✅ OpenAI library available")
-    except ImportError:
-        print("❌ OpenAI library not found")
-        print("Install with: pip install openai")
-        return False
-    
-    try:
-        from flask import Flask
-        print("✅ Flask library available")
-    except ImportError:
-        print("❌ Flask library not found")
-        print("Install with: pip install flask flask-cors")
-        return False
+    # find_spec only locates the packages; importing openai would pull in httpx and pydantic
+    for module, name, install in (
+        ("openai", "OpenAI", "pip install openai"),
+        ("flask", "Flask", "pip install flask flask-cors"),
+    ):
+        if importlib.util.find_spec(module) is None:
+            print(f"❌ {name} library not found")
+            print(f"Install with: {install}")
+            return False
+        print(f"✅ {name} library available")
     
     return True
 